@@ -0,0 +1,63 @@
+"""Memory used by the message catalogs of many languages.
+
+The list command loads every language of a product at the same time, so
+the size of each MessageEntry counts.  We load the same po file for 50
+languages and measure the memory with tracemalloc, directly after loading
+and after writing all catalogs, because writing reads every attribute of
+every entry.
+"""
+
+from i18ndude import catalog
+
+import argparse
+import io
+import os
+import tempfile
+import tracemalloc
+
+
+def make_po(filename, messages):
+    """Write a po file where one message in ten has a default comment."""
+    lines = [
+        'msgid ""',
+        'msgstr ""',
+        '"Content-Type: text/plain; charset=utf-8\\n"',
+        "",
+    ]
+    for number in range(messages):
+        if number % 10 == 0:
+            lines.append('#. Default: "Message %d"' % number)
+        lines.append('msgid "message_%d"' % number)
+        lines.append('msgstr "Nachricht %d"' % number)
+        lines.append("")
+    with open(filename, "w") as file:
+        file.write("\n".join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--languages", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=4000)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = os.path.join(tempdir, "test.po")
+        make_po(filename, arguments.messages)
+        tracemalloc.start()
+        catalogs = [
+            catalog.MessageCatalog(filename=filename)
+            for language in range(arguments.languages)
+        ]
+        loaded = tracemalloc.get_traced_memory()[0]
+        for ctl in catalogs:
+            catalog.POWriter(io.StringIO(), ctl).write(sync=True)
+        written = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    print("%d languages with %d messages" % (arguments.languages, arguments.messages))
+    print("after loading: %6.1f MB" % (loaded / 1e6))
+    print("after writing: %6.1f MB" % (written / 1e6))
+
+
+if __name__ == "__main__":
+    main()
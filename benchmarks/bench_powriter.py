@@ -0,0 +1,64 @@
+"""Time of writing a catalog with the POWriter.
+
+The catalog has 10000 messages, each with two references and a default
+comment.  We write it to memory and to a file on disk, and show the best
+time of several runs.
+"""
+
+from i18ndude import catalog
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+
+def make_catalog(messages):
+    ctl = catalog.MessageCatalog(domain="testing")
+    for number in range(messages):
+        ctl.add(
+            "message_%d" % number,
+            msgstr="Nachricht %d" % number,
+            references=[
+                "src/plone/app/test/browser/view_%d.pt:%d" % (number % 50, number),
+                "src/plone/app/test/content_%d.py:%d" % (number % 20, number),
+            ],
+            automatic_comments=['Default: "Message %d"' % number],
+        )
+    return ctl
+
+
+def best_time(function, runs):
+    times = []
+    for run in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=20)
+    arguments = parser.parse_args()
+    ctl = make_catalog(arguments.messages)
+
+    def to_memory():
+        catalog.POWriter(io.StringIO(), ctl).write(sort=True)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = os.path.join(tempdir, "test.po")
+
+        def to_file():
+            with open(filename, "w") as file:
+                catalog.POWriter(file, ctl).write(sort=True)
+
+        print("%d messages, best of %d runs" % (arguments.messages, arguments.runs))
+        print("io.StringIO:  %6.1f ms" % (best_time(to_memory, arguments.runs) * 1000))
+        print("file on disk: %6.1f ms" % (best_time(to_file, arguments.runs) * 1000))
+
+
+if __name__ == "__main__":
+    main()
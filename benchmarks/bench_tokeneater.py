@@ -0,0 +1,51 @@
+"""Time of extracting the messages of a large Python tree.
+
+Each msgid is used twice, so the TokenEater has to look up every msgid
+that it has seen before, to compare the defaults.  When this lookup takes
+constant time, the time grows linearly with the number of calls.
+"""
+
+from i18ndude import extract
+
+import argparse
+import os
+import tempfile
+import time
+
+
+def make_tree(path, calls, per_module=500):
+    """Write modules with `calls` message calls in total."""
+    for start in range(0, calls, per_module):
+        lines = ["from zope.i18nmessageid import MessageFactory", ""]
+        lines.append("_ = MessageFactory('testing')")
+        for number in range(start, min(start + per_module, calls)):
+            # Each msgid is used twice.
+            msgid = "message_%d" % (number // 2)
+            lines.append("_(%r, default=%r)" % (msgid, "Message"))
+        filename = os.path.join(path, "module_%d.py" % (start // per_module))
+        with open(filename, "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, nargs="+", default=[10000, 25000, 50000])
+    parser.add_argument(
+        "--extractor", choices=sorted(extract.PYTHON_EXTRACTORS), default="tokenize"
+    )
+    arguments = parser.parse_args()
+
+    print("%8s %10s %10s" % ("calls", "msgids", "seconds"))
+    for calls in arguments.calls:
+        with tempfile.TemporaryDirectory() as tempdir:
+            make_tree(tempdir, calls)
+            start = time.perf_counter()
+            messages = extract.py_strings(
+                tempdir, domain="testing", extractor=arguments.extractor
+            )
+            seconds = time.perf_counter() - start
+        print("%8d %10d %10.2f" % (calls, len(messages), seconds))
+
+
+if __name__ == "__main__":
+    main()
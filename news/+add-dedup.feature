@@ -0,0 +1 @@
+Adding references and comments to a msgid that has many of them is no longer quadratic.
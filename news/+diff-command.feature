@@ -0,0 +1 @@
+Added ``diff`` command.  Given a pot file with ``--pot`` and po files, it prints as JSON which msgids a ``sync`` would add, remove and change in each po file, without changing them.
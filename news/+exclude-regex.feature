@@ -0,0 +1 @@
+Match the ``--exclude`` patterns with one combined regular expression when finding files.
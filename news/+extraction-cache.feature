@@ -0,0 +1 @@
+Added ``rebuild-pot --cache <filename>`` option.  This remembers the messages found in each file, so the next run only reads the files that have changed.
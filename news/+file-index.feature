@@ -0,0 +1,2 @@
+``rebuild-pot`` now walks the directories only once for all extractors, instead of eight times.
+Excluded directories are no longer entered at all.
@@ -0,0 +1 @@
+References in po and pot files now always use forward slashes, also on Windows.  Before, the conversion was done but its result was thrown away.
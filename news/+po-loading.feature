@@ -0,0 +1,2 @@
+Load po files with the charset from their ``Content-Type`` header, and decode them while they are parsed.
+Previously the locale encoding was used, so for example ``iso-8859-1`` files could fail to load.
@@ -0,0 +1,3 @@
+Parse po files in a single pass.
+``POParser`` can now be iterated over and yields each ``MessageEntry`` as soon as it has been read.
+This makes loading catalogs in ``sync``, ``list`` and other commands faster.
@@ -0,0 +1 @@
+The po writer renders messages to lines and writes them in chunks, instead of writing each line separately.
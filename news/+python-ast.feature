@@ -0,0 +1 @@
+Added ``rebuild-pot --keywords`` option with the names of the functions that mark messages in Python code, for example ``--keywords="_ PMF"``.  Added ``rebuild-pot --python-extractor=ast`` to find these messages with the ``ast`` module instead of ``tokenize``.  Python files without calls of these functions are skipped quickly.
@@ -0,0 +1 @@
+Added ``rebuild-pot --domains domain1,domain2 --output-dir DIR`` options.  This reads all files once and writes a ``DIR/<domain>.pot`` file for each of the domains.
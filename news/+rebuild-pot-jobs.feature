@@ -0,0 +1 @@
+Add ``--jobs`` option to the ``rebuild-pot`` command to read page templates, Python files, GenericSetup profiles and ZCML files in parallel worker processes.
@@ -0,0 +1 @@
+Added ``rebuild-pot --resolve-domains`` option.  This finds the domain of messages in Python code by looking at ``MessageFactory("domain")`` calls and following the imports of the factories within the package.  Calls of these factories are extracted too, and messages from other domains no longer end up in the pot file.
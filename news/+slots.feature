@@ -0,0 +1,2 @@
+Use less memory per ``MessageEntry``: it uses ``__slots__`` and only creates the lists for comments and references when they are needed.
+Loading 50 languages with 4000 messages each now takes about 40 percent less memory.
@@ -0,0 +1,2 @@
+Add ``--jobs`` option to the ``sync`` command to sync the po files in parallel worker processes.
+The report lines are still printed in the order of the given files.
@@ -0,0 +1 @@
+With ``rebuild-pot --jobs`` the page templates are divided over the worker processes as well, each with its own TAL engine.
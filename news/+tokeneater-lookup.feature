@@ -0,0 +1 @@
+Python message extraction is no longer quadratic in the number of distinct msgids.  Checking for a different default of a msgid that was seen before is now a dictionary lookup.
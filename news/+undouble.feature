@@ -0,0 +1 @@
+Speed up creating message entries: ``undouble_unicode_escape`` returns plain strings immediately and caches the result for the rest.
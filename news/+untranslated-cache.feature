@@ -0,0 +1 @@
+Added ``--cache <filename>`` option to ``find-untranslated``.  The report for each file is stored there, and the next time only the files that have changed are checked again.
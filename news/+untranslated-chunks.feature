@@ -0,0 +1 @@
+``find-untranslated`` collects the text of an element in chunks and joins them once.  Templates with large blocks of text are no longer checked in quadratic time.
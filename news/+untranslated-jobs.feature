@@ -0,0 +1 @@
+Added ``--jobs`` option to ``find-untranslated``.  The files are then checked in parallel worker processes, each with its own parser.  The reports are shown in the order of the files.
@@ -0,0 +1 @@
+Added ``--format json`` option to ``find-untranslated``.  Each problem is then reported as a line of JSON with filename, line, column, severity and message, and the report of each file is written as soon as the file has been checked.
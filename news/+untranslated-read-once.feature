@@ -0,0 +1 @@
+find-untranslated reads each file only once.  The trees of the lxml xml and html parsers are checked directly, instead of serializing them and parsing them again.  Reports for these trees now show the line of the element in the original file.
@@ -0,0 +1 @@
+Added ``watch`` command.  This rebuilds the pot file whenever a page template, Python file, GenericSetup profile or ZCML file changes.  It takes the same options as ``rebuild-pot``.  What was found in each file is kept in memory, so only the changed files are read again.  On Linux it uses inotify, elsewhere it checks the modification times every ``--interval`` seconds.
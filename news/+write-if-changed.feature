@@ -0,0 +1 @@
+``sync``, ``merge``, ``rebuild-pot`` and ``watch`` no longer rewrite a po or pot file when its contents stay the same, so its modification time does not change.  For pot files a new ``POT-Creation-Date`` alone does not count as a change.
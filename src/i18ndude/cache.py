@@ -0,0 +1,198 @@
+"""Cache of the messages that were extracted from each file.
+
+Rebuilding a pot file means reading all templates, Python files, GenericSetup
+profiles and ZCML files again, even when only one of them has changed.  The
+ExtractionCache remembers what was found in each file, so unchanged files do
+not have to be read again.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+
+
+# Change this when the format of the extraction results changes.
+CACHE_FORMAT = "1"
+
+
+def get_cache_version():
+    """Return the version of the cache contents.
+
+    Results from a different i18ndude version may have been extracted in
+    a different way, so they cannot be used.
+    """
+    try:
+        from importlib.metadata import version
+
+        i18ndude_version = version("i18ndude")
+    except Exception:
+        i18ndude_version = "unknown"
+    return f"{CACHE_FORMAT}:{i18ndude_version}"
+
+
+def file_hash(filename):
+    with open(filename, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+class ExtractionCache:
+    """Cache of extraction results per file, stored in an SQLite database.
+
+    The results are stored by kind of extraction and path.  When the
+    modification time and size of a file are the same as last time, or
+    else its contents are the same, we use the stored result.
+
+    The cache can be passed to other processes: each process opens its own
+    connection to the database.  Use it as a context manager to make sure
+    the connection is closed.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._connection = None
+
+    def __getstate__(self):
+        return {"filename": self.filename}
+
+    def __setstate__(self, state):
+        self.filename = state["filename"]
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is not None:
+            return self._connection
+        # Several processes may use the cache at the same time,
+        # so wait for a lock instead of failing immediately.
+        connection = sqlite3.connect(self.filename, timeout=60)
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "kind TEXT, path TEXT, mtime INTEGER, size INTEGER, hash TEXT, "
+                "result BLOB, PRIMARY KEY (kind, path))"
+            )
+            version = get_cache_version()
+            row = connection.execute(
+                "SELECT value FROM meta WHERE key = 'version'"
+            ).fetchone()
+            if row is None or row[0] != version:
+                connection.execute("DELETE FROM files")
+                connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                    (version,),
+                )
+        self._connection = connection
+        return connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def extract(self, kind, function, filenames, executor=None, chunksize=1):
+        """Return function(filename) for each of the filenames, in order.
+
+        Stored results are used for unchanged files.  The function is only
+        called for the other files, using the executor if one is given.
+        """
+        connection = self.connection
+        results = [None] * len(filenames)
+        # index, filename, mtime, size, hash of the files we need to read
+        todo = []
+        updated = []
+        for index, filename in enumerate(filenames):
+            stat = os.stat(filename)
+            row = connection.execute(
+                "SELECT mtime, size, hash, result FROM files "
+                "WHERE kind = ? AND path = ?",
+                (kind, filename),
+            ).fetchone()
+            if row is not None and row[:2] == (stat.st_mtime_ns, stat.st_size):
+                results[index] = pickle.loads(row[3])
+                continue
+            digest = file_hash(filename)
+            if row is not None and row[2] == digest:
+                # Touched, but not changed.
+                results[index] = pickle.loads(row[3])
+                updated.append((stat.st_mtime_ns, stat.st_size, kind, filename))
+                continue
+            todo.append((index, filename, stat.st_mtime_ns, stat.st_size, digest))
+
+        todo_filenames = [item[1] for item in todo]
+        if executor is not None:
+            found = executor.map(function, todo_filenames, chunksize=chunksize)
+        else:
+            found = map(function, todo_filenames)
+        stored = []
+        for (index, filename, mtime, size, digest), result in zip(todo, found):
+            results[index] = result
+            stored.append((kind, filename, mtime, size, digest, pickle.dumps(result)))
+
+        with connection:
+            connection.executemany(
+                "UPDATE files SET mtime = ?, size = ? WHERE kind = ? AND path = ?",
+                updated,
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(kind, path, mtime, size, hash, result) VALUES (?, ?, ?, ?, ?, ?)",
+                stored,
+            )
+        return results
+
+
+class MemoryCache:
+    """Cache of extraction results per file, kept in memory.
+
+    This has the same `extract` method as the ExtractionCache, for when
+    we run for a long time, like in the watch command.  We only look at
+    the modification time and size of the files.  The results are stored
+    pickled, because the readers may change what they get.
+    """
+
+    def __init__(self):
+        # (kind, path) -> (mtime, size, pickled result)
+        self.files = {}
+
+    def extract(self, kind, function, filenames, executor=None, chunksize=1):
+        """Return function(filename) for each of the filenames, in order.
+
+        Stored results are used for unchanged files.  The function is only
+        called for the other files, using the executor if one is given.
+        """
+        results = [None] * len(filenames)
+        # index, filename, mtime, size of the files we need to read
+        todo = []
+        for index, filename in enumerate(filenames):
+            stat = os.stat(filename)
+            stored = self.files.get((kind, filename))
+            if stored is not None and stored[:2] == (stat.st_mtime_ns, stat.st_size):
+                results[index] = pickle.loads(stored[2])
+                continue
+            todo.append((index, filename, stat.st_mtime_ns, stat.st_size))
+
+        todo_filenames = [item[1] for item in todo]
+        if executor is not None:
+            found = executor.map(function, todo_filenames, chunksize=chunksize)
+        else:
+            found = map(function, todo_filenames)
+        for (index, filename, mtime, size), result in zip(todo, found):
+            results[index] = result
+            self.files[(kind, filename)] = (mtime, size, pickle.dumps(result))
+        return results
+
+    def forget(self, paths):
+        """Forget the results for these paths, for example removed files."""
+        paths = set(paths)
+        for key in [key for key in self.files if key[1] in paths]:
+            del self.files[key]
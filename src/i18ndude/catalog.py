@@ -5,6 +5,10 @@ from i18ndude.utils import wrapAndQuoteString
 from i18ndude.utils import wrapString
 from zope.i18nmessageid import Message
 
+import codecs
+import copyreg
+import functools
+import io
 import os
 import re
 import sys
@@ -40,6 +44,10 @@ MAX_OCCUR = 3  # maximum number of occurrences listed
 ORIGINAL_COMMENT = " Original: "
 DEFAULT_COMMENT = " Default: "
 
+# The start of a reference that we leave out: everything up to the first
+# Products, products or src directory, tried in this order.
+REFERENCE_PREFIX = re.compile(r"(?:.*?Products/|.*?products/|.*?src/)", re.DOTALL)
+
 
 def now():
     fmt = "%Y-%m-%d %H:%M+0000"
@@ -53,20 +61,114 @@ def is_literal_id(msgid):
         return True
 
 
+@functools.lru_cache(maxsize=2**16)
+def normalize_reference(ref):
+    """Return a reference as we write it in a po file, and its filename.
+
+    Paths use forward slashes, and start after the Products or src
+    directory.  References repeat a lot, so we cache them.
+
+    >>> normalize_reference("/home/me/src/plone.app.foo/src/plone/app/foo/x.pt:3")
+    ('plone.app.foo/src/plone/app/foo/x.pt:3', 'plone.app.foo/src/plone/app/foo/x.pt')
+    >>> normalize_reference("./Products/CMFPlone/src/view.py:12")
+    ('CMFPlone/src/view.py:12', 'CMFPlone/src/view.py')
+    >>> normalize_reference("browser/view.pt")
+    ('browser/view.pt', 'browser/view.pt')
+    """
+    if os.sep != "/":
+        ref = ref.replace(os.sep, "/")
+    ref = REFERENCE_PREFIX.sub("", ref, count=1)
+    return ref, ref.split(":")[0]
+
+
+# What we use for a list attribute of a MessageEntry without items, when we
+# only read it.
+EMPTY = ()
+
+
+def _lazy_list(name):
+    """Property for a list attribute of a MessageEntry.
+
+    Most entries have no comments or references.  Instead of a fresh empty
+    list per entry we store None, and only create the list the first time
+    the attribute is used.  Code in this module that only reads the list
+    uses _items, so that does not create it.
+    """
+
+    def get(self):
+        value = getattr(self, name)
+        if value is None:
+            value = []
+            setattr(self, name, value)
+        return value
+
+    def set(self, value):
+        setattr(self, name, list(value) if value else None)
+
+    return property(get, set)
+
+
+def _items(entry, name):
+    """Return the items of a list attribute of a MessageEntry, for reading.
+
+    `name` is the slot, like "_references".  Unlike the attribute itself,
+    this does not create an empty list.
+    """
+    return getattr(entry, name) or EMPTY
+
+
 class MessageEntry:
     """MessageEntry is class representing one msgid with its accompanying
     msgstr and optional positional information and comments.
     """
 
+    # Catalogs of many languages hold a lot of entries in memory at the same
+    # time, so we do not want a __dict__ per entry.
+    __slots__ = ("msgid", "msgstr", "_references", "_automatic_comments", "_comments")
+
+    references = _lazy_list("_references")
+    automatic_comments = _lazy_list("_automatic_comments")
+    comments = _lazy_list("_comments")
+
     def __init__(
-        self, msgid, msgstr="", references=[], automatic_comments=[], comments=[]
+        self, msgid, msgstr="", references=None, automatic_comments=None, comments=None
     ):
         """Build a MessageEntry."""
         self.msgid = msgid
         self.msgstr = undouble_unicode_escape(msgstr)
-        self.references = references
-        self.automatic_comments = automatic_comments
-        self.comments = comments
+        # We copy the lists, so changing them does not change the lists of
+        # the caller, which are often those of another entry.
+        self._references = list(references) if references else None
+        self._automatic_comments = (
+            list(automatic_comments) if automatic_comments else None
+        )
+        self._comments = list(comments) if comments else None
+
+    def extend(self, name, values):
+        """Add the values that the list attribute `name` does not have yet.
+
+        `name` is "references", "automatic_comments" or "comments".  Popular
+        msgids can have hundreds of references, so when we add more than one
+        value, we check against a set of the list instead of the list.
+        """
+        if not values:
+            return
+        slot = "_" + name
+        current = getattr(self, slot)
+        if current is None:
+            current = []
+            setattr(self, slot, current)
+        if len(values) == 1:
+            # The readers add one value at a time, and then making a set
+            # costs more than it saves.
+            if values[0] not in current:
+                current.append(values[0])
+            return
+        seen = set(current)
+        for value in values:
+            if value not in seen:
+                seen.add(value)
+                current.append(value)
 
     def __repr__(self):
         """Textual representation of a MessageEntry."""
@@ -86,9 +188,10 @@ class MessageEntry:
         if (
             self.msgid == other.msgid
             and self.msgstr == other.msgstr
-            and self.references == other.references
-            and self.automatic_comments == other.automatic_comments
-            and self.comments == other.comments
+            and _items(self, "_references") == _items(other, "_references")
+            and _items(self, "_automatic_comments")
+            == _items(other, "_automatic_comments")
+            and _items(self, "_comments") == _items(other, "_comments")
         ):
             return True
         return False
@@ -103,7 +206,7 @@ class MessageEntry:
     def getDefaultComment(self, multiple=False):
         """Returns the automatic comment starting with Default:"""
         defaults = []
-        for c in self.automatic_comments:
+        for c in _items(self, "_automatic_comments"):
             if c.startswith(DEFAULT_COMMENT):
                 defaults.append(c)
         if len(defaults) == 0:
@@ -133,7 +236,7 @@ class MessageEntry:
 
     def getOriginalComment(self):
         """Returns the comment line starting with Original:"""
-        for c in self.comments:
+        for c in _items(self, "_comments"):
             if c.startswith(ORIGINAL_COMMENT):
                 return c
         return None
@@ -181,6 +284,20 @@ class MessageCatalog(OrderedDict):
         elif domain:
             self.mime_header["Domain"] = domain
 
+    def __reduce__(self):
+        """Support pickling, for example to pass catalogs between processes.
+
+        OrderedDict would recreate us by calling MessageCatalog() without
+        arguments, which is not allowed.
+        """
+        return (
+            copyreg.__newobj__,
+            (self.__class__,),
+            self.__dict__,
+            None,
+            iter(self.items()),
+        )
+
     def getComments(self, msgid):
         """Returns the commentary lines that I have for a msgid."""
         assert msgid in self
@@ -230,9 +347,9 @@ class MessageCatalog(OrderedDict):
         references and automatic comments to the entry."""
         if isinstance(msgid, MessageEntry):
             msgstr = msgid.msgstr
-            references = msgid.references
-            automatic_comments = msgid.automatic_comments
-            comments = msgid.comments
+            references = _items(msgid, "_references")
+            automatic_comments = _items(msgid, "_automatic_comments")
+            comments = _items(msgid, "_comments")
             msgid = msgid.msgid
         if not isinstance(msgid, str):
             msgid = msgid.decode(self.encoding)
@@ -266,21 +383,10 @@ class MessageCatalog(OrderedDict):
                     "\n".join(self[msgid].references),
                 )
                 sys.stderr.write(msg)
-            if comments:
-                comments = [c for c in comments if c not in self[msgid].comments]
-                self[msgid].comments.extend(comments)
-            if references:
-                references = [
-                    ref for ref in references if ref not in self[msgid].references
-                ]
-                self[msgid].references.extend(references)
-            if automatic_comments:
-                automatic_comments = [
-                    ac
-                    for ac in automatic_comments
-                    if ac not in self[msgid].automatic_comments
-                ]
-                self[msgid].automatic_comments.extend(automatic_comments)
+            entry = self[msgid]
+            entry.extend("comments", comments)
+            entry.extend("references", references)
+            entry.extend("automatic_comments", automatic_comments)
 
     def add_missing(self, msgctl, defaultmsgstr="", mergewarn=None):
         """Each msgid that I miss and ``msgctl`` contains will be included in
@@ -290,17 +396,7 @@ class MessageCatalog(OrderedDict):
         ids = []
         for key in msgctl:
             if key not in self:
-                entry = msgctl[key]
-                msgstr = defaultmsgstr or entry.msgstr
-                if isinstance(key, Message):
-                    msgstr = key.default or msgstr
-                self.add(
-                    key,
-                    msgstr=msgstr,
-                    comments=entry.comments,
-                    references=entry.references,
-                    automatic_comments=entry.automatic_comments,
-                )
+                self._add_from(msgctl, key, defaultmsgstr)
                 ids.append(key)
             elif mergewarn:
                 message = "Merge-Warning: Key is already in target-catalog: %s" % key
@@ -308,6 +404,20 @@ class MessageCatalog(OrderedDict):
 
         return ids
 
+    def _add_from(self, msgctl, key, defaultmsgstr=""):
+        """Add the entry for key from another catalog, with its context."""
+        entry = msgctl[key]
+        msgstr = defaultmsgstr or entry.msgstr
+        if isinstance(key, Message):
+            msgstr = key.default or msgstr
+        self.add(
+            key,
+            msgstr=msgstr,
+            comments=_items(entry, "_comments"),
+            references=_items(entry, "_references"),
+            automatic_comments=_items(entry, "_automatic_comments"),
+        )
+
     def merge(self, msgctl):
         """Each msgid that I miss and ``msgctl`` contains will be included in
         my catalog."""
@@ -316,9 +426,9 @@ class MessageCatalog(OrderedDict):
             self.add(
                 key,
                 msgstr=entry.msgstr,
-                comments=entry.comments,
-                references=entry.references,
-                automatic_comments=entry.automatic_comments,
+                comments=_items(entry, "_comments"),
+                references=_items(entry, "_references"),
+                automatic_comments=_items(entry, "_automatic_comments"),
             )
 
     def sync(self, msgctl):
@@ -327,13 +437,51 @@ class MessageCatalog(OrderedDict):
         and overwrites the comments with the ones from the given catalog. This
         is used in the sync command.
         """
-        removed_msgids = [quote(msgid) for msgid in self.accept_ids(msgctl.keys())]
-        self.overwrite_context(msgctl)
-        added_msgids = [quote(msgid) for msgid in self.add_missing(msgctl)]
+        added, removed, changed = self.diff(msgctl)
+        for key in removed:
+            del self[key]
+        for key in added:
+            self._add_from(msgctl, key)
+        for key in changed:
+            entry = self[key]
+            new_entry = msgctl[key]
+            entry.references = _items(new_entry, "_references")
+            entry.extend("automatic_comments", _items(new_entry, "_automatic_comments"))
 
         self.mime_header["POT-Creation-Date"] = msgctl.mime_header["POT-Creation-Date"]
 
-        return (added_msgids, removed_msgids)
+        return ([quote(msgid) for msgid in added], [quote(msgid) for msgid in removed])
+
+    def diff(self, msgctl):
+        """Compare me with the given catalog, usually a po file with its pot file.
+
+        Returns three lists of msgids: the ids that I miss, in the order of
+        the given catalog, the ids that the given catalog does not have, in
+        my order, and the ids that we both have, but with different context:
+        other references, or automatic comments that I do not have, like a
+        changed default.  A sync would add, remove and update these.
+        """
+        mine = self.keys()
+        theirs = msgctl.keys()
+        removed = [key for key in mine if key not in theirs]
+        added = []
+        changed = []
+        for key in theirs:
+            if key not in mine:
+                added.append(key)
+                continue
+            entry = self[key]
+            new_entry = msgctl[key]
+            if _items(entry, "_references") != _items(new_entry, "_references"):
+                changed.append(key)
+                continue
+            # There are only a few automatic comments, so a list will do.
+            automatic_comments = _items(entry, "_automatic_comments")
+            for ac in _items(new_entry, "_automatic_comments"):
+                if ac not in automatic_comments:
+                    changed.append(key)
+                    break
+        return added, removed, changed
 
     def overwrite_context(self, msgctl):
         """For each message in the given message catalog that I know of,
@@ -341,10 +489,10 @@ class MessageCatalog(OrderedDict):
         one."""
         for key in msgctl.keys():
             if key in self:
-                self[key].references = msgctl[key].references
-                for ac in msgctl[key].automatic_comments:
-                    if ac not in self[key].automatic_comments:
-                        self[key].automatic_comments.append(ac)
+                self[key].references = _items(msgctl[key], "_references")
+                self[key].extend(
+                    "automatic_comments", _items(msgctl[key], "_automatic_comments")
+                )
 
     def accept_ids(self, ids):
         """Remove all messages from the catalog where the id is not in argument
@@ -372,12 +520,17 @@ class MessageCatalog(OrderedDict):
         return removed_ids
 
     def _initialize_with(self, filename):
-        # reading in text mode, but likely to contain bytes
-        file = open(filename)
-        parser = POParser(file)
-        parser.read()
-        file.close()
-        header = parser.msgdict.get("")
+        header = None
+        with open(filename, "rb") as file:
+            self._read_charset(file)
+            # newline=None gives the same universal newlines as a text mode
+            # file.  The file is decoded while we parse it.
+            text = io.TextIOWrapper(file, encoding=self.codec(), newline=None)
+            for entry in POParser(text):
+                if entry.msgid == "":
+                    header = entry
+                else:
+                    self[entry.msgid] = entry
         if header is None:
             sys.stderr.write(
                 "%s misses 'msgid \"\"' and 'msgstr \"\"' "
@@ -387,11 +540,36 @@ class MessageCatalog(OrderedDict):
             try:
                 self.commentary_header = header.comments
                 self._parse_mime_header(header.msgstr)
-                del parser.msgdict[""]
             except KeyError:
                 sys.stderr.write("%s lacks MIME header." % filename)
-        # Update the file after the header has been read.
-        self.update(parser.msgdict)
+                self[""] = header
+
+    def _read_charset(self, file):
+        """Read the charset from the header of a po file opened in binary mode.
+
+        We parse the header block, so ``_parse_mime_header`` can tell us the
+        charset, and go back to the start of the file.
+        """
+        # The header is the first block, ending at the first blank line.
+        block = []
+        for line in file:
+            if block and not line.strip():
+                break
+            block.append(line)
+        block = str(b"".join(block), "utf-8", "replace")
+        for entry in POParser(io.StringIO(block, newline=None)):
+            if entry.msgid == "":
+                self._parse_mime_header(entry.msgstr)
+                break
+        file.seek(0)
+
+    def codec(self):
+        """Return the name of the codec for the charset of the header."""
+        try:
+            return codecs.lookup(self.encoding).name
+        except LookupError:
+            # For example the 'CHARSET' placeholder of a fresh pot file.
+            return "utf-8"
 
     def _parse_mime_header(self, msgstr):
         pairs = [line.split(":", 1) for line in msgstr.split(r"\n") if line]
@@ -407,111 +585,121 @@ class POParser:
 
     """Parses an existing po- file and builds a dictionary according to
     MessageCatalog. POParser is the deserializer, POWriter the serializer.
+
+    Iterating over a POParser yields the MessageEntries in the order in which
+    they appear in the file, so a caller does not need to wait for the whole
+    file to be read.
     """
 
     def __init__(self, file):
         self._file = file
-        self._in_paren = re.compile(r'"(.*)"')
         self.msgdict = OrderedDict()  # see MessageCatalog for structure
-        self.line = ""
-        self.sameMessageEntry = True
-        self.msgid = ""
-        self.msgstr = ""
-        self.references = []
-        self.automatic_comments = []
-        self.comments = []
 
     def read(self):
         """Start reading from file.
 
         After the call to read() has finished, you may access the structure
         that I read in through the ``msgdict`` attribute."""
+        for entry in self:
+            self.msgdict[entry.msgid] = entry
 
-        for no, line in enumerate(self._file):
-            self.line = line
+    def __iter__(self):
+        """Yield a MessageEntry for each message in the file.
 
-            oldstatus = self.sameMessageEntry
-            if oldstatus:
-                self._readSameMessage()
-            else:
-                self._readNewMessage()
-
-            newstatus = self.sameMessageEntry
-            if oldstatus != newstatus:
-                # function changed stateid: call new function with same line
-                if newstatus:
-                    self._readSameMessage()
+        Each line is classified once by its prefix.  The quoted fragments of
+        msgid and msgstr are collected in lists and joined once per entry.
+        """
+        seen = set()
+        in_msgstr = False
+        msgid_parts = []
+        msgstr_parts = []
+        references = []
+        automatic_comments = []
+        comments = []
+
+        for line in self._file:
+            if line.startswith("#") or line.startswith("msgid"):
+                if in_msgstr:
+                    # A new message starts: the previous one is complete.
+                    msgid = "".join(msgid_parts)
+                    seen.add(msgid)
+                    yield MessageEntry(
+                        msgid,
+                        msgstr="".join(msgstr_parts),
+                        references=references,
+                        automatic_comments=automatic_comments,
+                        comments=comments,
+                    )
+                    in_msgstr = False
+                    msgid_parts = []
+                    msgstr_parts = []
+                    references = []
+                    automatic_comments = []
+                    comments = []
+                if line[0] != "#":
+                    # msgid line
+                    parts = msgid_parts
+                elif line[1:2] == ":":
+                    references.append(line[2:].strip())
+                    continue
+                elif line[1:2] == ".":
+                    line = line[2:].rstrip()
+                    if line.startswith(ORIGINAL_COMMENT):
+                        line = line.replace(ORIGINAL_COMMENT, DEFAULT_COMMENT)
+                    if line not in automatic_comments:
+                        automatic_comments.append(line)
+                    continue
                 else:
-                    self._readNewMessage()
+                    line = line[1:].rstrip()
+                    if line.startswith(ORIGINAL_COMMENT) or line.startswith(
+                        DEFAULT_COMMENT
+                    ):
+                        line = line.replace(ORIGINAL_COMMENT, DEFAULT_COMMENT)
+                        if line not in automatic_comments:
+                            automatic_comments.append(line)
+                    else:
+                        comments.append(line)
+                    continue
+            elif line.startswith("msgstr"):
+                in_msgstr = True
+                parts = msgstr_parts
+            elif in_msgstr:
+                parts = msgstr_parts
+            else:
+                parts = msgid_parts
+            # Take everything between the first and the last double quote.
+            start = line.find('"')
+            end = line.rfind('"')
+            if start < end:
+                parts.append(line[start + 1 : end])
 
         # last msg
-        if self.msgid not in self.msgdict:
-            self.line = "#:"
-            self._readNewMessage()
-
-    def _readSameMessage(self):
-        """We're reading a comment or msgid."""
-        line = self.line
-        if line.startswith("msgstr"):
-            self.sameMessageEntry = False
-        elif line.startswith("#:"):
-            self.references.append(line[2:].strip())
-        elif line.startswith("#."):
-            line = line[2:].rstrip()
-            ls = line.startswith
-            if ls(ORIGINAL_COMMENT):
-                line = line.replace(ORIGINAL_COMMENT, DEFAULT_COMMENT)
-            if line not in self.automatic_comments:
-                self.automatic_comments.append(line)
-        elif line.startswith("#"):
-            line = line[1:].rstrip()
-            ls = line.startswith
-            if ls(ORIGINAL_COMMENT) or ls(DEFAULT_COMMENT):
-                line = line.replace(ORIGINAL_COMMENT, DEFAULT_COMMENT)
-                if line not in self.automatic_comments:
-                    self.automatic_comments.append(line)
-            else:
-                self.comments.append(line)
-        else:
-            search = self._in_paren.search(line)
-            if search:
-                self.msgid += search.groups()[0]
-
-    def _readNewMessage(self):
-        """We're reading msgstr."""
-        sw = self.line.startswith
-        if sw("#") or sw("msgid"):
-            self.sameMessageEntry = True
-            self.msgdict[self.msgid] = MessageEntry(
-                self.msgid,
-                msgstr=self.msgstr,
-                references=self.references,
-                automatic_comments=self.automatic_comments,
-                comments=self.comments,
+        msgid = "".join(msgid_parts)
+        if msgid not in seen:
+            yield MessageEntry(
+                msgid,
+                msgstr="".join(msgstr_parts),
+                references=references,
+                automatic_comments=automatic_comments,
+                comments=comments,
             )
-            # reset variables
-            self.msgid = self.msgstr = ""
-            self.references = []
-            self.automatic_comments = []
-            self.comments = []
-        else:
-            search = self._in_paren.search(self.line)
-            if search:
-                self.msgstr += search.groups()[0]
 
 
 class POWriter:
+    # Number of messages that we render before we write them to the file.
+    chunk_size = 1000
+
     def __init__(self, file, catalog):
         """Initialize a POWriter with a filelike object that I am to write to."""
         self._file = file
         self._msgctl = catalog
 
-    def _printToFile(self, file, string):
-        """Print wrapper which allows to specifiy an output encoding"""
-        if string:
-            string = string.strip()
-            file.write(string)
-        file.write("\n")
+    def _write_lines(self, lines):
+        """Write lines to the file with one call.
+
+        Leading and trailing whitespace is stripped from each line.
+        """
+        self._file.write("".join([line.strip() + "\n" for line in lines]))
 
     def write(self, sort=True, msgstrToComment=False, sync=False):
         """Start writing to file."""
@@ -521,30 +709,40 @@ class POWriter:
     def _write_header(self):
         """Writes out commentary and mime headers."""
         ctl = self._msgctl
-        f = self._file
 
         # header
-        for line in ctl.commentary_header:
-            self._printToFile(f, "#%s" % line)
+        lines = ["#%s" % line for line in ctl.commentary_header]
 
         if not ctl.mime_header:  # mime-header n/a
-            self._printToFile(f, False)
+            lines.append("")
+            self._write_lines(lines)
             return
 
         # write out mime:
-        self._printToFile(f, 'msgid ""')
-        self._printToFile(f, 'msgstr ""')
+        lines.append('msgid ""')
+        lines.append('msgstr ""')
 
         for key in ctl.mime_header.keys():
-            self._printToFile(f, f'"{key}: {ctl.mime_header[key]}\\n"')
+            lines.append(f'"{key}: {ctl.mime_header[key]}\\n"')
+        self._write_lines(lines)
 
     def _write_messages(self, sort, msgstrToComment, sync):
-        """Writes the messages out."""
-        f = self._file
+        """Writes the messages out.
+
+        The messages are rendered to lines, and written in chunks.
+        """
         ids = sorted(self._msgctl.keys())
-        for id in ids:
+        lines = []
+        for count, id in enumerate(ids, 1):
             entry = self._msgctl[id]
-            self._print_entry(f, id, entry, msgstrToComment=msgstrToComment, sync=sync)
+            lines += self._entry_lines(
+                id, entry, msgstrToComment=msgstrToComment, sync=sync
+            )
+            if count % self.chunk_size == 0:
+                self._write_lines(lines)
+                lines = []
+        if lines:
+            self._write_lines(lines)
 
     def _create_msgid(self, value):
         # Wrap over multiple lines if needed.
@@ -558,20 +756,20 @@ class POWriter:
         # Quote all lines and separate them by newlines.
         return 'msgstr "%s"' % '"\n"'.join(values)
 
-    def _print_entry(self, f, id, entry, msgstrToComment, sync):
-        """Writes a MessageEntry to file."""
-        self._printToFile(f, False)
+    def _entry_lines(self, id, entry, msgstrToComment, sync):
+        """Returns the lines for a MessageEntry."""
+        lines = [""]
 
         msgstr = entry.msgstr
-        comments = entry.comments
-        automatic_comments = entry.automatic_comments
+        comments = _items(entry, "_comments")
+        automatic_comments = _items(entry, "_automatic_comments")
 
         msg_changed = False
         fuzzy = False
 
         for comment in comments:
             if not comment.startswith(", fuzzy") and not comment.startswith(" , fuzzy"):
-                self._printToFile(f, "#%s" % comment)
+                lines.append("#%s" % comment)
             else:
                 fuzzy = True
 
@@ -590,7 +788,7 @@ class POWriter:
             msgstr = msgstr.replace("&#9632;", "\u25A0")
             msgstr = msgstr.replace("&#9675;", "\u25CB")
             msgstr = msgstr.replace("&#9679;", "\u25CF")
-            self._printToFile(f, f'#.{DEFAULT_COMMENT}"{msgstr}"')
+            lines.append(f'#.{DEFAULT_COMMENT}"{msgstr}"')
             msgstr = ""
 
         # used in sync to filter duplicate default comments
@@ -604,27 +802,15 @@ class POWriter:
                 automatic_comments.remove(default_comments[0])
 
         for ac in automatic_comments:
-            self._printToFile(f, "#.%s" % ac)
+            lines.append("#.%s" % ac)
 
         # key is the filename, value is the filename or filename:lineno
         refs = {}
-        for ref in entry.references:
-            pparts = ref.split("Products%s" % os.sep)
-            p2parts = ref.split("products%s" % os.sep)
-            sparts = ref.split("src%s" % os.sep, 1)
-            if len(pparts) > 1:
-                ref = pparts[1]
-            elif len(p2parts) > 1:
-                ref = p2parts[1]
-            elif len(sparts) > 1:
-                ref = sparts[1]
-            # Normalize path separators to unix-style
-            ref.replace(os.sep, "/")
-
+        for ref in _items(entry, "_references"):
+            ref, filename = normalize_reference(ref)
             # We can have two references to the same file
             # but with different line number. We only include
             # the reference once.
-            filename = ref.split(":")[0]
             if filename not in refs:
                 refs[filename] = ref
 
@@ -633,67 +819,150 @@ class POWriter:
         #        include_ellipsis = MAX_OCCUR is not None and \
         #                           len(refs_values[MAX_OCCUR:])
         for idx, ref in enumerate(refs_values[:MAX_OCCUR]):
-            self._printToFile(f, "#: %s" % ref)
+            lines.append("#: %s" % ref)
         #            if include_ellipsis and idx == MAX_OCCUR - 1:
-        # self._printToFile(f, '#: %s' % ref)
-        # self._printToFile(f, '#: ...')
+        # lines.append('#: %s' % ref)
+        # lines.append('#: ...')
 
         if msgstr and (msg_changed or fuzzy):
-            self._printToFile(f, "#, fuzzy")
+            lines.append("#, fuzzy")
 
         # Add backslash escape to id.
         if '"' in id and '\\"' not in id:
             id = id.replace('"', '\\"')
 
-        self._printToFile(f, self._create_msgid(id))
+        lines.append(self._create_msgid(id))
         if "\\n" not in msgstr:
-            self._printToFile(f, self._create_msgstr(msgstr))
+            lines.append(self._create_msgstr(msgstr))
         else:
-            self._printToFile(f, 'msgstr ""')
-            lines = msgstr.split("\\n")
-            for line in lines[:-1]:
+            lines.append('msgstr ""')
+            parts = msgstr.split("\\n")
+            for line in parts[:-1]:
                 # Restore the literal backslash-n at the end
                 line += "\\n"
                 # Wrap over multiple lines if needed.
                 newline = wrapAndQuoteString(line)
-                self._printToFile(f, newline)
-            if lines[-1]:
+                lines.append(newline)
+            if parts[-1]:
                 # This is the part after the last literal backslash-n
-                newline = wrapAndQuoteString(lines[-1])
-                self._printToFile(f, newline)
+                newline = wrapAndQuoteString(parts[-1])
+                lines.append(newline)
+        return lines
+
+
+def _header_text(catalog):
+    """Return the header of a catalog as POWriter writes it."""
+    output = io.StringIO()
+    POWriter(output, catalog)._write_header()
+    return output.getvalue()
+
+
+def write_catalog(filename, catalog, ignore_headers=(), **kwargs):
+    """Write a catalog to a po or pot file, but only when this changes the file.
+
+    The keyword arguments are passed to POWriter.write.  When the file
+    already has the same contents, we do not touch it, so its modification
+    time stays the same, and tools like make do not compile it again.
+    Lines of the mime headers in `ignore_headers`, like the creation date of
+    a pot file, do not count as a change.
+
+    The file is written in the charset of the catalog, so a latin-1 po file
+    stays latin-1.  When a message cannot be written in that charset, we
+    change the charset in the header to utf-8.
+
+    Returns True when the file was written.
+    """
+    encoding = catalog.codec()
+    output = io.StringIO()
+    POWriter(output, catalog).write(**kwargs)
+    content = output.getvalue()
+    try:
+        content.encode(encoding)
+    except UnicodeEncodeError:
+        # We only write the header again: writing the messages with sync
+        # changes them, so a second time would lose the fuzzy markers.
+        header = len(_header_text(catalog))
+        encoding = "utf-8"
+        catalog.encoding = encoding
+        catalog.mime_header["Content-Type"] = "text/plain; charset=utf-8"
+        content = _header_text(catalog) + content[header:]
+    if os.linesep != "\n":
+        # This is what writing the file in text mode does.
+        content = content.replace("\n", os.linesep)
+    try:
+        with open(filename, encoding=encoding, newline="") as file:
+            existing = file.read()
+    except (OSError, UnicodeDecodeError):
+        existing = None
+    if existing is not None:
+        ignored = tuple('"%s:' % header for header in ignore_headers)
+
+        def compared(text):
+            lines = text.split(os.linesep)
+            if not ignored:
+                return lines
+            return [line for line in lines if not line.startswith(ignored)]
+
+        if compared(existing) == compared(content):
+            return False
+    with open(filename, "w", encoding=encoding, newline="") as file:
+        file.write(content)
+    return True
 
 
 class PTReader:
     """Reads in a list of page templates."""
 
-    def __init__(self, path, domain="none", exclude=(), include_line_numbers=True):
+    def __init__(
+        self,
+        path,
+        domain="none",
+        exclude=(),
+        include_line_numbers=True,
+        cache=None,
+        domains=None,
+    ):
         self.domain = domain
         self.catalogs = {}  # keyed by domain name
         self.path = path
         self.exclude = exclude
         self.include_line_numbers = include_line_numbers
+        # Optional ExtractionCache with results from earlier runs.
+        self.cache = cache
+        # Read the messages of all these domains, instead of only our domain.
+        self.domains = domains or (domain,)
 
-    def read(self):
+    def read(self, executor=None):
         """Reads in from all given ZPTs and builds up MessageCatalogs accordingly.
 
         The MessageCatalogs can after this call be accessed through attribute
         ``catalogs``, which indexes the MessageCatalogs by their domain.
+
+        If you pass a ``concurrent.futures`` executor, the templates are
+        divided over its worker processes.
         """
-        from .extract import tal_strings
+        from .extract import tal_domain_strings
 
-        tal = tal_strings(
-            self.path, domain=self.domain, exclude=self.exclude + ("tests", "docs")
+        catalogs = tal_domain_strings(
+            self.path,
+            exclude=self.exclude + ("tests", "docs"),
+            executor=executor,
+            cache=self.cache,
         )
 
-        for msgid in tal:
-            msgstr = msgid.default or ""
+        for domain in self.domains:
+            tal = catalogs.get(domain, {})
+            for msgid in tal:
+                msgstr = msgid.default or ""
 
-            if msgid and msgid != "${DYNAMIC_CONTENT}":
-                if self.include_line_numbers:
-                    filenames = [line[0] + ":" + str(line[1]) for line in tal[msgid]]
-                else:
-                    filenames = sorted({line[0] for line in tal[msgid]})
-                self._add_msg(msgid, msgstr, [], filenames, [], self.domain)
+                if msgid and msgid != "${DYNAMIC_CONTENT}":
+                    if self.include_line_numbers:
+                        filenames = [
+                            line[0] + ":" + str(line[1]) for line in tal[msgid]
+                        ]
+                    else:
+                        filenames = sorted({line[0] for line in tal[msgid]})
+                    self._add_msg(msgid, msgstr, [], filenames, [], domain)
 
         return []
 
@@ -719,12 +988,33 @@ class PTReader:
 class PYReader:
     """Reads in a list of python scripts."""
 
-    def __init__(self, path, domain, exclude=(), include_line_numbers=True):
+    def __init__(
+        self,
+        path,
+        domain,
+        exclude=(),
+        include_line_numbers=True,
+        cache=None,
+        keywords=None,
+        extractor="tokenize",
+        resolve_domains=False,
+        domains=None,
+    ):
         self.domain = domain
         self.catalogs = {}  # keyed by domain name
         self.path = path
         self.exclude = exclude
         self.include_line_numbers = include_line_numbers
+        # Optional ExtractionCache with results from earlier runs.
+        self.cache = cache
+        # Names of the functions that mark messages, and how to find them.
+        self.keywords = keywords
+        self.extractor = extractor
+        # Find the domain of each message from its MessageFactory,
+        # instead of putting all messages in our domain.
+        self.resolve_domains = resolve_domains
+        # The domains for messages of which we do not know the domain.
+        self.domains = domains or (domain,)
 
     def read(self):
         """Reads in from all given PYs and builds up MessageCatalogs
@@ -738,16 +1028,28 @@ class PYReader:
         readable error message.
         """
 
+        from .extract import DEFAULT_KEYWORDS
+        from .extract import py_domain_strings
         from .extract import py_strings
 
-        py = py_strings(self.path, self.domain, exclude=self.exclude + ("tests",))
+        kwargs = {
+            "exclude": self.exclude + ("tests",),
+            "cache": self.cache,
+            "keywords": self.keywords or DEFAULT_KEYWORDS,
+        }
+        if self.resolve_domains:
+            catalogs = py_domain_strings(self.path, self.domains, **kwargs)
+        else:
+            py = py_strings(self.path, self.domain, extractor=self.extractor, **kwargs)
+            catalogs = dict.fromkeys(self.domains, py)
 
-        for msgid in py:
-            if self.include_line_numbers:
-                filenames = [line[0] + ":" + str(line[1]) for line in py[msgid]]
-            else:
-                filenames = sorted({line[0] for line in py[msgid]})
-            self._add_msg(msgid, msgid.default or "", [], filenames, [], self.domain)
+        for domain, py in catalogs.items():
+            for msgid in py:
+                if self.include_line_numbers:
+                    filenames = [line[0] + ":" + str(line[1]) for line in py[msgid]]
+                else:
+                    filenames = sorted({line[0] for line in py[msgid]})
+                self._add_msg(msgid, msgid.default or "", [], filenames, [], domain)
         return []
 
     def _add_msg(self, msgid, msgstr, comments, references, automatic_comments, domain):
@@ -772,13 +1074,22 @@ class PYReader:
 class GSReader:
     """Reads in a list of GenericSetup profile files."""
 
-    def __init__(self, path, domain, exclude=(), include_line_numbers=True):
+    def __init__(
+        self,
+        path,
+        domain,
+        exclude=(),
+        include_line_numbers=True,
+        cache=None,
+    ):
         self.domain = domain
         self.catalogs = {}  # keyed by domain name
         self.path = path
         self.exclude = exclude
         # Note: the current extractor does not give us line numbers at all.
         self.include_line_numbers = include_line_numbers
+        # Optional ExtractionCache with results from earlier runs.
+        self.cache = cache
 
     def read(self):
         """Reads in from all given xml's and builds up MessageCatalogs
@@ -794,7 +1105,9 @@ class GSReader:
 
         from .gsextract import gs_strings
 
-        gs = gs_strings(self.path, self.domain, exclude=self.exclude + ("tests",))
+        gs = gs_strings(
+            self.path, self.domain, exclude=self.exclude + ("tests",), cache=self.cache
+        )
 
         for domain in gs:
             for msgid in gs[domain]:
@@ -823,12 +1136,21 @@ class GSReader:
 class ZCMLReader:
     """Reads in a list of ZCML files."""
 
-    def __init__(self, path, domain, exclude=(), include_line_numbers=True):
+    def __init__(
+        self,
+        path,
+        domain,
+        exclude=(),
+        include_line_numbers=True,
+        cache=None,
+    ):
         self.domain = domain
         self.catalogs = {}  # keyed by domain name
         self.path = path
         self.exclude = exclude
         self.include_line_numbers = include_line_numbers
+        # Optional ExtractionCache with results from earlier runs.
+        self.cache = cache
 
     def read(self):
         """Reads in from all given zcml's and builds up MessageCatalogs
@@ -844,7 +1166,9 @@ class ZCMLReader:
 
         from .zcmlextract import zcml_strings
 
-        zcml = zcml_strings(self.path, self.domain, exclude=self.exclude + ("tests",))
+        zcml = zcml_strings(
+            self.path, self.domain, exclude=self.exclude + ("tests",), cache=self.cache
+        )
 
         for domain in zcml:
             for msgid in zcml[domain]:
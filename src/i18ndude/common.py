@@ -1,4 +1,6 @@
+from io import BytesIO
 from io import StringIO
+from io import TextIOWrapper
 from lxml import etree
 
 import re
@@ -67,14 +69,7 @@ def prepare_xml(file):
     return StringIO(content)
 
 
-def tree_content(tree):
-    content = etree.tostring(tree)
-    if content is None:
-        return
-    return StringIO(content.decode().strip())
-
-
-def present_file_contents(filename):
+def present_file_contents(filename, data=None):
     """Present the file in various ways.
 
     It is hard to parse files that may be plain html, plain xml, or a
@@ -86,21 +81,26 @@ def present_file_contents(filename):
     the original template.
 
     So we we present the file in various way, that other code can
-    iterate over.
+    iterate over: first as a file with tidied up xml, then as lxml trees.
+    The file is read only once.  If you have already read it, you can pass
+    its contents as bytes in ``data``.
     """
+    if data is None:
+        with open(filename, "rb") as fh:
+            data = fh.read()
     errors = []
     # First try our (t)rusty old way, as that reports the original line
-    # numbers.
-    with open(filename) as fh:
-        yield prepare_xml(fh)
+    # numbers.  Decode the file like open(filename) would.
+    yield prepare_xml(TextIOWrapper(BytesIO(data)))
     # Then try to parse as nice xml.
     # If that fails, try to parse it as html.
     for parser in (None, HTML_PARSER):
         try:
-            tree = etree.parse(filename, parser)
+            tree = etree.parse(BytesIO(data), parser, base_url=filename)
         except etree.XMLSyntaxError as error:
             errors.append(error)
         else:
-            yield tree_content(tree)
+            if tree.getroot() is not None:
+                yield tree
     # Give back any errors we found.
     yield errors
@@ -32,17 +32,28 @@ from i18ndude.interfaces import ITokenEater
 from zope.i18nmessageid import Message
 from zope.interface import implementer
 
+import ast
 import fnmatch
+import functools
+import io
 import os
+import re
 import sys
 import time
 import tokenize
 import traceback
+import warnings
 
 
 DEFAULT_CHARSET = "utf-8"
 DEFAULT_ENCODING = "8bit"
 
+# Names of the functions that mark messages in Python code.
+DEFAULT_KEYWORDS = ("_",)
+
+# Number of templates that a worker process handles in one go.
+TAL_CHUNKSIZE = 8
+
 
 # Modified header, which is more suitable for any project
 
@@ -270,8 +281,12 @@ class TokenEater:
     Note that everything gets converted to string.
     """
 
-    def __init__(self):
+    def __init__(self, keywords=DEFAULT_KEYWORDS):
+        self.__keywords = frozenset(keywords)
         self.__messages = {}
+        # The first Message we saw for each msgid.  Its default is the
+        # one that counts.
+        self.__msgids = {}
         self.__state = self.__waiting
         self.__data = []
         self.__lineno = -1
@@ -282,7 +297,7 @@ class TokenEater:
         self.__state(ttype, tstring, stup[0])
 
     def __waiting(self, ttype, tstring, lineno):
-        if ttype == tokenize.NAME and tstring in ["_"]:
+        if ttype == tokenize.NAME and tstring in self.__keywords:
             self.__state = self.__keywordseen
 
     def __suiteseen(self, ttype, tstring, lineno):
@@ -374,11 +389,13 @@ class TokenEater:
 
         if default is not None:
             default = str(default)
+        self.add_entry(self.__curfile, msg, default, lineno, isdocstring)
+
+    def add_entry(self, filename, msg, default, lineno, isdocstring=0):
+        """Add a message that was found at line `lineno` of `filename`."""
         msg = Message(msg, default=default)
-        if msg in self.__messages:
-            messages = list(self.__messages.keys())
-            idx = messages.index(msg)
-            existing_msg = messages[idx]
+        existing_msg = self.__msgids.setdefault(msg, msg)
+        if existing_msg is not msg:
             if msg.default != existing_msg.default:
                 references = "\n".join(
                     [
@@ -386,21 +403,19 @@ class TokenEater:
                         for location in self.__messages[msg].keys()
                     ]
                 )
-                # XXX this does not appear to have any test coverage
-                # the actual warnings are emitted by zope.tal
                 sys.stderr.write(
                     "Warning: msgid '%s' in %s already exists "
                     "with a different default (bad: %s, should be: %s)\n"
                     "The references for the existent value are:\n%s\n"
                     % (
                         msg,
-                        self.__curfile + ":" + str(lineno),
+                        filename + ":" + str(lineno),
                         msg.default,
                         existing_msg.default,
                         references,
                     )
                 )
-        entry = (self.__curfile, lineno)
+        entry = (filename, lineno)
         self.__messages.setdefault(msg, {})[entry] = isdocstring
 
     def set_filename(self, filename):
@@ -429,64 +444,339 @@ class TokenEater:
         return catalog
 
 
+class EntryRecorder(TokenEater):
+    """TokenEater that only records the messages it finds in one file.
+
+    The entries can be added to a TokenEater later, see `py_strings`.
+    """
+
+    def __init__(self, keywords=DEFAULT_KEYWORDS):
+        TokenEater.__init__(self, keywords=keywords)
+        self.entries = []
+
+    def add_entry(self, filename, msg, default, lineno, isdocstring=0):
+        self.entries.append((msg, default, lineno, isdocstring))
+
+
+class FileIndex:
+    """Index of the files in one or more directories.
+
+    The directories are walked only once.  Directories that are in
+    `exclude` are not entered at all.  The files are kept in buckets by
+    extension, so each extractor can quickly find the files it needs, see
+    `find_files`.
+    """
+
+    def __init__(self, dir, exclude=()):
+        self.exclude = tuple(exclude)
+        # Files that were passed explicitly instead of a directory.
+        self.files = []
+        # Extension -> list of (dirpath, name) tuples.
+        self.buckets = {}
+        folders = dir
+        if isinstance(dir, str):
+            folders = (dir,)
+        for folder in folders:
+            if os.path.isdir(folder):
+                if not set(self.exclude).intersection(folder.split(os.path.sep)):
+                    self._walk(folder)
+            else:
+                self.files.append(folder)
+
+    def _walk(self, top):
+        # Like os.walk we do not follow symbolic links to directories, and we
+        # ignore directories that we cannot read.
+        exclude = set(self.exclude)
+        buckets = self.buckets
+        todo = [top]
+        while todo:
+            dirpath = todo.pop()
+            try:
+                entries = list(os.scandir(dirpath))
+            except OSError:
+                continue
+            for entry in entries:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    ext = os.path.splitext(name)[1]
+                    buckets.setdefault(ext, []).append((dirpath, name))
+                elif name not in exclude and not entry.is_symlink():
+                    todo.append(os.path.join(dirpath, name))
+
+    def _candidates(self, pattern):
+        """Return the buckets with files that might match the pattern."""
+        ext_pattern = pattern[1:]
+        if (
+            pattern.startswith("*.")
+            and "." not in ext_pattern[1:]
+            and os.path.sep not in ext_pattern
+        ):
+            # Whatever the star matches, a matching file name must end with
+            # an extension that matches '.<something without a dot>'.
+            # Files without extension, like '.pt', need a check anyway.
+            return [
+                files
+                for ext, files in self.buckets.items()
+                if not ext or fnmatch.fnmatch(ext, ext_pattern)
+            ]
+        return list(self.buckets.values())
+
+    def find(self, pattern, exclude=()):
+        """Return the sorted paths of the files with a name matching pattern.
+
+        Files in a directory from `exclude` are skipped, and so are files
+        with a name that matches one of the `exclude` patterns.  Files that
+        were passed explicitly only need to match the pattern.
+        """
+        match = compile_patterns((pattern,))
+        excluded = compile_patterns(exclude)
+        extra_exclude = set(exclude).difference(self.exclude)
+        # dirpath -> whether it is in an excluded directory
+        excluded_dirs = {}
+        result = []
+        for files in self._candidates(pattern):
+            for dirpath, name in files:
+                if not match(name) or excluded(name):
+                    continue
+                if extra_exclude:
+                    skip = excluded_dirs.get(dirpath)
+                    if skip is None:
+                        skip = not extra_exclude.isdisjoint(dirpath.split(os.path.sep))
+                        excluded_dirs[dirpath] = skip
+                    if skip:
+                        continue
+                result.append(os.path.join(dirpath, name))
+        result += [name for name in self.files if match(name)]
+        return sorted(result)
+
+
+def compile_patterns(patterns):
+    """Return a function that checks if a name matches any of the patterns.
+
+    The patterns are shell-style, as for fnmatch, and are combined into one
+    regular expression.
+
+    >>> match = compile_patterns(("*.py", "test?.pt"))
+    >>> bool(match("script.py")), bool(match("test1.pt")), bool(match("a.pt"))
+    (True, True, False)
+    >>> bool(compile_patterns(())("script.py"))
+    False
+    """
+    if not patterns:
+        return lambda name: None
+    regex = re.compile(
+        "|".join(fnmatch.translate(os.path.normcase(pattern)) for pattern in patterns)
+    )
+
+    def match(name):
+        return regex.match(os.path.normcase(name))
+
+    return match
+
+
 def find_files(dir, pattern, exclude=()):
-    files = []
-    folders = dir
-
-    if isinstance(dir, str):
-        folders = (dir,)
-
-    def visit(files, dirpath, names):
-        # exclude dirnames
-        dirnames = dirpath.split(os.path.sep)
-        for ex in exclude:
-            if ex in dirnames:
-                return
-        # exclude filenames and regexps for those
-        for ex in exclude:
-            names[:] = [x for x in names if not fnmatch.fnmatch(x, ex)]
-        files += [
-            os.path.join(dirpath, name) for name in fnmatch.filter(names, pattern)
-        ]
-
-    for folder in folders:
-        if os.path.isdir(folder):
-            for dirpath, dirnames, filenames in os.walk(folder):
-                visit(files, dirpath, filenames)
-        else:
-            if fnmatch.filter([folder], pattern):
-                files.append(folder)
-    return sorted(files)
+    """Find files with a name matching pattern in dir.
 
+    dir can be a path, a list of paths, or a FileIndex.  When you need to
+    look for several patterns in the same paths, a FileIndex saves
+    walking the directories again.
+    """
+    if not isinstance(dir, FileIndex):
+        dir = FileIndex(dir, exclude=exclude)
+    return dir.find(pattern, exclude=exclude)
 
-# We don't want to assume a default domain of Zope
-# def py_strings(dir, domain="zope", exclude=()):
 
+def extract_files(function, filenames, kind, cache=None, executor=None, chunksize=1):
+    """Return function(filename) for each of the filenames, in order.
 
-def py_strings(dir, domain="none", exclude=()):
-    """Retrieve all Python messages from `dir` that are in the `domain`."""
-    eater = TokenEater()
-    make_escapes(0)
-    for filename in find_files(
+    When you pass an ExtractionCache, unchanged files are not read again.
+    `kind` tells the cache which kind of extraction this is.  When you pass
+    a `concurrent.futures` executor, the files are divided over its workers.
+    """
+    if cache is not None:
+        return cache.extract(
+            kind, function, filenames, executor=executor, chunksize=chunksize
+        )
+    if executor is not None:
+        return executor.map(function, filenames, chunksize=chunksize)
+    return map(function, filenames)
+
+
+@functools.lru_cache(maxsize=None)
+def keyword_call_regex(keywords):
+    """Return a regular expression that finds calls of the keywords.
+
+    Files in which this finds nothing have no messages, so we do not need
+    to tokenize or parse them.
+    """
+    names = b"|".join(re.escape(keyword.encode("utf-8")) for keyword in keywords)
+    return re.compile(rb"\b(?:%s)[\s\\]*\(" % names)
+
+
+def py_file_entries(filename, keywords=DEFAULT_KEYWORDS):
+    """Return the messages in one Python file.
+
+    These are (msgid, default, lineno, isdocstring) tuples.
+    """
+    with open(filename, "rb") as fp:  # tokenize expects bytes
+        source = fp.read()
+    if not keyword_call_regex(tuple(keywords)).search(source):
+        return []
+    recorder = EntryRecorder(keywords=keywords)
+    recorder.set_filename(filename)
+    try:
+        g = tokenize.tokenize(io.BytesIO(source).readline)
+        for ttype, tstring, stup, etup, line in g:
+            recorder(ttype, tstring, stup, etup, line)
+    except tokenize.TokenError as e:
+        sys.stderr.write(
+            "%s: %s, line %d, column %d" % (e[0], filename, e[1][0], e[1][1])
+        )
+    return recorder.entries
+
+
+def is_string(node):
+    return isinstance(node, ast.Constant) and isinstance(node.value, str)
+
+
+def call_entry(node):
+    """Return the entry for a call of a keyword, or None.
+
+    The entry is the same as those of `EntryRecorder`.
+    """
+    args = node.args
+    keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+    if args:
+        msgid = args[0]
+        args = args[1:]
+    else:
+        msgid = keywords.pop("msgid", None)
+    if not is_string(msgid):
+        # We can only extract literal strings.
+        return None
+    default = keywords.pop("default", None)
+    if default is None and args:
+        default = args[0]
+    if is_string(default):
+        default = default.value
+    elif args or keywords:
+        # Like the TokenEater: when there are more arguments, but no
+        # default, the default is empty.
+        default = ""
+    else:
+        default = None
+    # The line of the opening parenthesis, like the TokenEater.
+    return (msgid.value, default, node.func.end_lineno, 0)
+
+
+def tree_entries(tree, keywords=DEFAULT_KEYWORDS):
+    r"""Return the messages in the syntax tree of a Python module.
+
+    These are the calls of the functions named in `keywords`, whether
+    they are called directly, like _("..."), or as attribute, like
+    self._("...").
+
+    >>> tree = ast.parse(
+    ...     "_('hello ${name}', 'buenos dias', {'name': 'Bob'})\n"
+    ...     "PMF(msgid='hi', default='hallo')\n"
+    ...     "other('no')\n"
+    ...     "_(variable)\n"
+    ...     "_('mapped', mapping={'name': _('inner')})\n"
+    ... )
+    >>> for entry in tree_entries(tree, keywords=("_", "PMF")):
+    ...     print(entry)
+    ('hello ${name}', 'buenos dias', 1, 0)
+    ('hi', 'hallo', 2, 0)
+    ('mapped', '', 5, 0)
+    ('inner', None, 5, 0)
+    """
+    keywords = frozenset(keywords)
+    calls = []
+    for node in ast.walk(tree):
+        if type(node) is not ast.Call:
+            continue
+        func = node.func
+        if type(func) is ast.Name:
+            name = func.id
+        elif type(func) is ast.Attribute:
+            name = func.attr
+        else:
+            continue
+        if name in keywords:
+            calls.append(node)
+    # ast.walk goes breadth first, but we want the order of the source.
+    calls.sort(key=lambda node: (node.lineno, node.col_offset))
+    return [entry for entry in map(call_entry, calls) if entry is not None]
+
+
+def ast_file_entries(filename, keywords=DEFAULT_KEYWORDS):
+    """Return the messages in one Python file, using the ast module.
+
+    The entries are the same as from `py_file_entries`.  Files that we
+    cannot parse, for example Python 2 code, are read with tokenize.
+    """
+    with open(filename, "rb") as fp:
+        source = fp.read()
+    if not keyword_call_regex(tuple(keywords)).search(source):
+        return []
+    try:
+        tree = ast.parse(source, filename)
+    except (SyntaxError, ValueError) as e:
+        sys.stderr.write("Cannot parse %s, using tokenize: %s\n" % (filename, e))
+        return py_file_entries(filename, keywords=keywords)
+    return tree_entries(tree, keywords=keywords)
+
+
+# How to find the messages in a Python file, see py_strings.
+PYTHON_EXTRACTORS = {
+    "ast": ast_file_entries,
+    "tokenize": py_file_entries,
+}
+
+
+def find_python_files(dir, exclude=()):
+    return find_files(
         # We want to include cpy and vpy scripts as well
         # dir, '*.py', exclude=('extract.py', 'pygettext.py')+tuple(exclude)):  # noqa
         dir,
         "*.*py",
         exclude=("extract.py", "pygettext.py") + tuple(exclude),
-    ):
-        fp = open(filename, "rb")  # tokenize expects bytes
-        try:
-            eater.set_filename(filename)
-            try:
-                g = tokenize.tokenize(fp.readline)
-                for ttype, tstring, stup, etup, line in g:
-                    eater(ttype, tstring, stup, etup, line)
-            except tokenize.TokenError as e:
-                sys.stderr.write(
-                    "%s: %s, line %d, column %d" % (e[0], filename, e[1][0], e[1][1])
-                )
-        finally:
-            fp.close()
+    )
+
+
+# We don't want to assume a default domain of Zope
+# def py_strings(dir, domain="zope", exclude=()):
+
+
+def py_strings(
+    dir,
+    domain="none",
+    exclude=(),
+    cache=None,
+    keywords=DEFAULT_KEYWORDS,
+    extractor="tokenize",
+):
+    """Retrieve all Python messages from `dir` that are in the `domain`.
+
+    Messages are the strings in calls of the functions named in `keywords`.
+    `extractor` is one of the PYTHON_EXTRACTORS: "tokenize" walks the
+    tokens of each file, "ast" parses each file and visits its calls.
+    """
+    keywords = tuple(keywords)
+    file_entries = functools.partial(PYTHON_EXTRACTORS[extractor], keywords=keywords)
+    # The results of another extractor, or other keywords, are different.
+    kind = "py-{}:{}".format(extractor, " ".join(keywords))
+    eater = TokenEater(keywords=keywords)
+    make_escapes(0)
+    filenames = find_python_files(dir, exclude)
+    results = extract_files(file_entries, filenames, kind, cache=cache)
+    for filename, entries in zip(filenames, results):
+        for msg, default, lineno, isdocstring in entries:
+            eater.add_entry(filename, msg, default, lineno, isdocstring)
     # One limitation of the Python message extractor is that it cannot
     # determine the domain of the string, since it is not contained anywhere
     # directly. The only way this could be done is by loading the module and
@@ -495,6 +785,228 @@ def py_strings(dir, domain="none", exclude=()):
     return eater.getCatalog()
 
 
+def call_name(node):
+    """Return the name of the function in a call, and if it is an attribute."""
+    func = node.func
+    if type(func) is ast.Name:
+        return func.id, False
+    if type(func) is ast.Attribute:
+        return func.attr, True
+    return None, False
+
+
+def domain_file_entries(filename, keywords=DEFAULT_KEYWORDS):
+    """Return the message factories and messages in one Python file.
+
+    This returns the bindings and the entries of the module.  The bindings
+    map names to a domain, for ``name = MessageFactory("domain")``, or to a
+    (level, module, name) tuple for ``from module import name``.  The entries
+    are like those of `EntryRecorder`, with the name of the called function
+    added: None when a keyword is called as attribute, like self._("...").
+    """
+    with open(filename, "rb") as fp:
+        source = fp.read()
+    try:
+        tree = ast.parse(source, filename)
+    except (SyntaxError, ValueError) as e:
+        sys.stderr.write("Cannot parse %s, using tokenize: %s\n" % (filename, e))
+        entries = py_file_entries(filename, keywords=keywords)
+        return {}, [entry + (None,) for entry in entries]
+    imports = []
+    assignments = []
+    calls = []
+    for node in ast.walk(tree):
+        node_type = type(node)
+        if node_type is ast.ImportFrom:
+            imports.append(node)
+        elif node_type is ast.Assign:
+            assignments.append(node)
+        elif node_type is ast.Call:
+            calls.append(node)
+    bindings = {}
+    # Names of the MessageFactory class itself.
+    factories = {"MessageFactory"}
+    for node in imports:
+        for alias in node.names:
+            name = alias.asname or alias.name
+            bindings[name] = (node.level, node.module or "", alias.name)
+            if alias.name == "MessageFactory":
+                factories.add(name)
+    for node in assignments:
+        value = node.value
+        if (
+            type(value) is not ast.Call
+            or call_name(value)[0] not in factories
+            or not value.args
+            or not is_string(value.args[0])
+        ):
+            continue
+        for target in node.targets:
+            if type(target) is ast.Name:
+                bindings[target.id] = value.args[0].value
+    keywords = frozenset(keywords)
+    entries = []
+    calls.sort(key=lambda node: (node.lineno, node.col_offset))
+    for node in calls:
+        name, is_attribute = call_name(node)
+        if is_attribute:
+            if name not in keywords:
+                continue
+            name = None
+        elif name not in keywords and name not in bindings:
+            continue
+        entry = call_entry(node)
+        if entry is not None:
+            entries.append(entry + (name,))
+    return bindings, entries
+
+
+def module_name(filename):
+    """Return the dotted name of a Python module, and if it is a package.
+
+    The name goes up to the first directory without __init__.py.
+    """
+    dirname, basename = os.path.split(os.path.abspath(filename))
+    is_package = basename == "__init__.py"
+    parts = []
+    if not is_package:
+        parts.append(basename.split(".")[0])
+    while os.path.isfile(os.path.join(dirname, "__init__.py")):
+        dirname, name = os.path.split(dirname)
+        parts.insert(0, name)
+    return ".".join(parts), is_package
+
+
+def absolute_module(module, is_package, level, target):
+    """Return the absolute name of a module that is imported.
+
+    >>> absolute_module("pkg.sub.view", False, 0, "other")
+    'other'
+    >>> absolute_module("pkg.sub.view", False, 1, "")
+    'pkg.sub'
+    >>> absolute_module("pkg.sub.view", False, 2, "i18n")
+    'pkg.i18n'
+    >>> absolute_module("pkg.sub", True, 1, "i18n")
+    'pkg.sub.i18n'
+    """
+    if not level:
+        return target
+    parts = module.split(".")
+    if not is_package:
+        parts.pop()
+    if level > 1:
+        parts = parts[: len(parts) - level + 1]
+    if target:
+        parts.append(target)
+    return ".".join(parts)
+
+
+class DomainResolver:
+    """Find the domain of the message factories in a set of modules.
+
+    The modules are registered with their bindings from
+    `domain_file_entries`.  Imports are followed from module to module.
+    """
+
+    # Imports of imports of ... stop somewhere.
+    max_depth = 20
+
+    def __init__(self):
+        # module name -> bindings with absolute imports
+        self.modules = {}
+        # imported module name -> name of our module, or None
+        self._found = {}
+
+    def add_module(self, name, is_package, bindings):
+        absolute = {}
+        for binding, value in bindings.items():
+            if not isinstance(value, str):
+                level, target, imported = value
+                value = (absolute_module(name, is_package, level, target), imported)
+            absolute[binding] = value
+        self.modules[name] = absolute
+
+    def find_module(self, name):
+        """Return the name of the registered module with this name.
+
+        The names of our modules are only as long as we have found
+        __init__.py files, so for namespace packages the start of the
+        imported name can be missing.
+        """
+        if name not in self._found:
+            found = None
+            if name in self.modules:
+                found = name
+            else:
+                for module in self.modules:
+                    if name.endswith("." + module):
+                        found = module
+                        break
+            self._found[name] = found
+        return self._found[name]
+
+    def resolve(self, module, name, depth=0):
+        """Return the domain of `name` in `module`, or None if unknown."""
+        if depth > self.max_depth:
+            return None
+        module = self.find_module(module)
+        if module is None:
+            return None
+        value = self.modules[module].get(name)
+        if value is None or isinstance(value, str):
+            return value
+        imported_module, imported = value
+        return self.resolve(imported_module, imported, depth + 1)
+
+
+def py_domain_strings(
+    dir,
+    domains=("none",),
+    exclude=(),
+    cache=None,
+    keywords=DEFAULT_KEYWORDS,
+):
+    """Retrieve all Python messages from `dir`, keyed by their domain.
+
+    Unlike `py_strings`, this looks for ``MessageFactory("domain")`` calls
+    and follows the imports of their results within the found modules, to
+    know the domain of each message.  Calls of these factories are
+    messages, as well as calls of the `keywords`.  Messages of which we
+    cannot find the domain are added to each of the `domains`.
+    """
+    keywords = tuple(keywords)
+    file_entries = functools.partial(domain_file_entries, keywords=keywords)
+    kind = "py-domains:{}".format(" ".join(keywords))
+    make_escapes(0)
+    filenames = find_python_files(dir, exclude)
+    results = list(extract_files(file_entries, filenames, kind, cache=cache))
+    resolver = DomainResolver()
+    modules = []
+    for filename, (bindings, entries) in zip(filenames, results):
+        name, is_package = module_name(filename)
+        resolver.add_module(name, is_package, bindings)
+        modules.append(name)
+    eaters = {}
+    for filename, module, (bindings, entries) in zip(filenames, modules, results):
+        for msg, default, lineno, isdocstring, name in entries:
+            msg_domain = None
+            if name is not None:
+                msg_domain = resolver.resolve(module, name)
+            if msg_domain is not None:
+                msg_domains = (msg_domain,)
+            elif name is not None and name not in keywords:
+                # Not a message factory after all.
+                continue
+            else:
+                msg_domains = domains
+            for msg_domain in msg_domains:
+                eater = eaters.get(msg_domain)
+                if eater is None:
+                    eater = eaters[msg_domain] = TokenEater(keywords=keywords)
+                eater.add_entry(filename, msg, default, lineno, isdocstring)
+    return {msg_domain: eater.getCatalog() for msg_domain, eater in eaters.items()}
+
+
 def zcml_strings(dir, domain="zope", site_zcml=None):
     """Retrieve all ZCML messages from `dir` that are in the `domain`."""
     from zope.app.appsetup import config
@@ -509,68 +1021,183 @@ def zcml_strings(dir, domain="zope", site_zcml=None):
     return context.i18n_strings.get(domain, {})
 
 
-def tal_strings(dir, domain="zope", include_default_domain=False, exclude=()):
-    """Retrieve all TAL messages from `dir` that are in the `domain`."""
-    # We import zope.tal.talgettext here because we can't rely on the
+class Devnull:
+    def write(self, s):
+        pass
+
+
+def tal_extract(engine, filename):
+    """Let the engine collect the TAL messages from one file.
+
+    When the file cannot be processed, the traceback is returned.
+    """
+    # We import zope.tal here because we can't rely on the
     # right sys path until app_dir has run
     from zope.tal.htmltalparser import HTMLTALParser
-    from zope.tal.talgettext import POEngine
     from zope.tal.talgettext import POTALInterpreter
     from zope.tal.talparser import TALParser
 
+    engine.file = filename
+    name, ext = os.path.splitext(filename)
+    # First try with standard zope.tal parsers.
+    if ext == ".html" or ext.endswith("pt"):
+        parser = HTMLTALParser()
+    else:
+        parser = TALParser()
+    try:
+        parser.parseFile(filename)
+        program, macros = parser.getCode()
+        POTALInterpreter(program, macros, engine, stream=Devnull(), metal=False)()
+    except KeyboardInterrupt:
+        raise
+    except Exception:
+        if ext == ".html" or ext.endswith("pt"):
+            # We can have one retry with our own generator.
+            gen = DudeGenerator(xml=0)
+            parser = HTMLTALParser(gen=gen)
+            try:
+                parser.parseFile(filename)
+                program, macros = parser.getCode()
+                POTALInterpreter(
+                    program, macros, engine, stream=Devnull(), metal=False
+                )()
+            except Exception:
+                return traceback.format_exc()
+        else:
+            return traceback.format_exc()
+
+
+def report_tal_error(filename, error):
+    print("There was an error processing", filename)
+    sys.stderr.write(error)
+
+
+def tal_file_catalog(filename):
+    """Return the TAL messages of one file, keyed by domain.
+
+    This uses its own engine, so it can run in a worker process.
+    Returns the catalog and the traceback of any error.
+    """
+    from zope.tal.talgettext import POEngine
+
     engine = POEngine()
+    error = tal_extract(engine, filename)
+    return engine.catalog, error
 
-    class Devnull:
-        def write(self, s):
-            pass
 
-    for filename in (
+def merge_tal_catalogs(catalogs):
+    """Merge the catalogs of several POEngines.
+
+    The locations are kept in the order of the catalogs, so the result is
+    the same as when one engine would have read all files.
+    """
+    result = {}
+    # Per domain, map each msgid to the first Message we saw for it,
+    # because that one determines the default.
+    first_msgids = {}
+    for catalog in catalogs:
+        for domain, messages in catalog.items():
+            target = result.setdefault(domain, {})
+            firsts = first_msgids.setdefault(domain, {})
+            for msgid, locations in messages.items():
+                if msgid not in target:
+                    target[msgid] = list(locations)
+                    firsts[msgid] = msgid
+                    continue
+                existing_msgid = firsts[msgid]
+                if msgid.default != existing_msgid.default:
+                    # The same warning as POEngine gives within one file.
+                    references = "\n".join(
+                        location[0] + ":" + str(location[1])
+                        for location in target[msgid]
+                    )
+                    warnings.warn(
+                        "Warning: msgid '%s' in %s already exists "
+                        "with a different default (bad: %s, should be: %s)\n"
+                        "The references for the existent value are:\n%s\n"
+                        % (
+                            msgid,
+                            locations[0][0] + ":" + str(locations[0][1]),
+                            msgid.default,
+                            existing_msgid.default,
+                            references,
+                        )
+                    )
+                target[msgid].extend(locations)
+    return result
+
+
+def tal_domain_strings(dir, exclude=(), executor=None, cache=None):
+    """Retrieve all TAL messages from `dir`, keyed by their domain.
+
+    Messages without domain are in the 'default' domain.
+    When you pass a `concurrent.futures` executor, the files are divided
+    over its workers.  When you pass an ExtractionCache, unchanged files
+    are not read again.
+    """
+    filenames = (
         find_files(dir, "*.*pt", exclude=tuple(exclude))
         + find_files(dir, "*.html", exclude=tuple(exclude))
         + find_files(dir, "*.kupu", exclude=tuple(exclude))
         + find_files(dir, "*.pox", exclude=tuple(exclude))
         + find_files(dir, "*.xsl", exclude=tuple(exclude))
-    ):
-        engine.file = filename
-        name, ext = os.path.splitext(filename)
-        # First try with standard zope.tal parsers.
-        if ext == ".html" or ext.endswith("pt"):
-            parser = HTMLTALParser()
-        else:
-            parser = TALParser()
-        try:
-            parser.parseFile(filename)
-            program, macros = parser.getCode()
-            POTALInterpreter(program, macros, engine, stream=Devnull(), metal=False)()
-        except KeyboardInterrupt:
-            raise
-        except Exception:
-            if ext == ".html" or ext.endswith("pt"):
-                # We can have one retry with our own generator.
-                gen = DudeGenerator(xml=0)
-                parser = HTMLTALParser(gen=gen)
-                try:
-                    parser.parseFile(filename)
-                    program, macros = parser.getCode()
-                    POTALInterpreter(
-                        program, macros, engine, stream=Devnull(), metal=False
-                    )()
-                except Exception:
-                    print("There was an error processing", filename)
-                    traceback.print_exc()
-            else:
-                print("There was an error processing", filename)
-                traceback.print_exc()
+    )
+    if executor is None and cache is None:
+        from zope.tal.talgettext import POEngine
+
+        engine = POEngine()
+        for filename in filenames:
+            error = tal_extract(engine, filename)
+            if error:
+                report_tal_error(filename, error)
+        engine_catalog = engine.catalog
+    else:
+        results = extract_files(
+            tal_file_catalog,
+            filenames,
+            "tal",
+            cache=cache,
+            executor=executor,
+            chunksize=TAL_CHUNKSIZE,
+        )
+        catalogs = []
+        for filename, (file_catalog, error) in zip(filenames, results):
+            if error:
+                report_tal_error(filename, error)
+            catalogs.append(file_catalog)
+        engine_catalog = merge_tal_catalogs(catalogs)
 
+    # We do not want column numbers.
+    return {
+        domain: {
+            msgid: [(loc[0], loc[1][0]) for loc in locations]
+            for msgid, locations in messages.items()
+        }
+        for domain, messages in engine_catalog.items()
+    }
+
+
+def tal_strings(
+    dir,
+    domain="zope",
+    include_default_domain=False,
+    exclude=(),
+    executor=None,
+    cache=None,
+):
+    """Retrieve all TAL messages from `dir` that are in the `domain`.
+
+    When you pass a `concurrent.futures` executor, the files are divided
+    over its workers.  When you pass an ExtractionCache, unchanged files
+    are not read again.
+    """
+    catalogs = tal_domain_strings(dir, exclude=exclude, executor=executor, cache=cache)
     # See whether anything in the domain was found
-    if domain not in engine.catalog:
+    if domain not in catalogs:
         return {}
-    # We do not want column numbers.
-    catalog = engine.catalog[domain].copy()
+    catalog = catalogs[domain]
     # When the Domain is 'default', then this means that none was found;
     # Include these strings; yes or no?
     if include_default_domain:
-        catalog.update(engine.catalog["default"])
-    for msgid, locations in catalog.items():
-        catalog[msgid] = [(loc[0], loc[1][0]) for loc in locations]
+        catalog.update(catalogs["default"])
     return catalog
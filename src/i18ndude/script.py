@@ -23,14 +23,25 @@
 
 from i18ndude import catalog
 from i18ndude import common
+from i18ndude import extract
 from i18ndude import untranslated
 from i18ndude import utils
 from i18ndude import visualisation
+from i18ndude.cache import ExtractionCache
+from i18ndude.cache import MemoryCache
+from i18ndude.watch import get_watcher
+from i18ndude.watch import InotifyWatcher
 
 import argparse
+import concurrent.futures
+import contextlib
+import functools
+import io
+import json
 import os
 import sys
 import textwrap
+import time
 import xml.sax
 
 
@@ -54,6 +65,78 @@ wrapper_parser.add_argument(
 )
 
 
+def job_count(value):
+    """Argument type for --jobs: a number of 0 or more."""
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError("must be 0 or more, not %s" % value)
+    return jobs
+
+
+# Define a parent parser for running work in parallel.  This is shared
+# by a few commands.
+jobs_parser = argparse.ArgumentParser(add_help=False)
+jobs_parser.add_argument(
+    "-j",
+    "--jobs",
+    metavar="NUMBER",
+    type=job_count,
+    default=1,
+    help=(
+        "Number of worker processes to use. "
+        "Use 0 for one per CPU. Default is 1: no parallel processing."
+    ),
+)
+
+
+# Define a parent parser for the options that say which pot files to write
+# and how to find the messages.  This is shared by rebuild-pot and watch.
+pot_parser = argparse.ArgumentParser(add_help=False)
+pot_parser.add_argument("-p", "--pot", metavar="filename", dest="pot_fn")
+pot_parser.add_argument(
+    "-c", "--create", metavar="domain", dest="create_domain", required=False
+)
+pot_parser.add_argument("-m", "--merge", metavar="filename", dest="merge_fn")
+pot_parser.add_argument("--merge2", metavar="filename", dest="merge2_fn")
+pot_parser.add_argument("--domains", metavar="domain1,domain2,...", default="")
+pot_parser.add_argument("--output-dir", metavar="directory")
+pot_parser.add_argument("--exclude", metavar='"<ignore1> <ignore2> ..."', default="")
+pot_parser.add_argument("--keywords", metavar='"<name1> <name2> ..."', default="")
+pot_parser.add_argument(
+    "--python-extractor",
+    choices=sorted(extract.PYTHON_EXTRACTORS),
+    default="tokenize",
+)
+pot_parser.add_argument("--resolve-domains", action="store_true")
+# You can switch line numbers on or off.  Both options store their value
+# in include_line_numbers.  The order is important:
+# the last one here wins, both in this file and on the command line.
+pot_parser.add_argument(
+    "--no-line-numbers",
+    action="store_false",
+    dest="include_line_numbers",
+    required=False,
+)
+pot_parser.add_argument(
+    "--line-numbers",
+    action="store_true",
+    dest="include_line_numbers",
+    required=False,
+)
+pot_parser.add_argument("path", nargs="*")
+
+
+def get_executor(arguments, **kwargs):
+    """Return a process pool executor for the --jobs argument.
+
+    Returns None when we should not run in parallel.
+    """
+    jobs = getattr(arguments, "jobs", 1)
+    if jobs == 1:
+        return None
+    return concurrent.futures.ProcessPoolExecutor(max_workers=jobs or None, **kwargs)
+
+
 def parse_wrapping_arguments(arguments):
     """Parse the arguments that handle wrapping.
 
@@ -121,9 +204,22 @@ def find_untranslated_parser(subparsers):
     be happy with this, but your template engine may fail when trying
     to render a template containing those ignore hints.  You need
     Chameleon 2.23 or higher, or the to be released zope.tal 4.1.2.
+
+    With the --jobs option the files are checked in parallel by that
+    number of worker processes.  The reports are still shown in the
+    order of the files.
+
+    With the --cache <filename> option I remember the report for each file.
+    The next time I only check the files that have changed since then.
+
+    With --format json the report is meant for other programs: each
+    problem is a line of JSON with the filename, line, column, severity
+    and message.  The -s and -n options are then ignored.  The lines for a
+    file are written as soon as that file has been checked.
     """
     parser = subparsers.add_parser(
         "find-untranslated",
+        parents=[jobs_parser],
         formatter_class=argparse.RawDescriptionHelpFormatter,
         description=description,
     )
@@ -142,81 +238,182 @@ def find_untranslated_parser(subparsers):
         action="store_true",
         help=("The report will contain only the errors for each file."),
     )
+    parser.add_argument(
+        "--format",
+        choices=("text", "json"),
+        default="text",
+        dest="output_format",
+        help="Format of the report: text (default) or json lines.",
+    )
+    parser.add_argument("--cache", metavar="filename", dest="cache_fn")
     parser.add_argument("files", nargs="*", help="list of ZPT filenames")
     parser.set_defaults(func=find_untranslated)
     return parser
 
 
-def find_untranslated(arguments):
-    parser = xml.sax.make_parser(["expat"])
-    # disable external validation to make it work without network access
-    parser.setFeature(xml.sax.handler.feature_external_ges, False)
-    parser.setFeature(xml.sax.handler.feature_external_pes, False)
+def make_untranslated_handler(silent=False, nosummary=False, output_format="text"):
+    """Return a template parser and a find-untranslated handler for it."""
+    parser = untranslated.TemplateParser()
     handler = untranslated.VerboseHandler(parser)  # default
 
-    if arguments.silent:
+    if output_format == "json":
+        handler = untranslated.JSONLinesHandler(parser)
+    elif silent:
         handler = untranslated.SilentHandler(parser)
-    elif arguments.nosummary:
+    elif nosummary:
         handler = untranslated.NoSummaryVerboseHandler(parser)
 
     parser.setContentHandler(handler)
+    return parser, handler
+
+
+def check_untranslated(parser, handler, filename):
+    """Check one file for untranslated messages.
+
+    Returns the report for the file, which may be empty, and the number of
+    errors: one when untranslated messages were found, and one more when
+    the file could not be parsed at all.
+    """
     errors = 0
-    for filename in filter_isfile(arguments.files):  # parse file by file
-        with open(filename) as myfile:
-            try:
-                if not myfile.read().strip():
-                    continue
-            except UnicodeDecodeError:
-                print("ERROR: UnicodeDecodeError while reading {}".format(filename))
-                continue
+    with open(filename, "rb") as myfile:
+        data = myfile.read()
+    try:
+        # Decode the file like open(filename) would.
+        if not io.TextIOWrapper(io.BytesIO(data)).read().strip():
+            return "", errors
+    except UnicodeDecodeError:
+        handler.set_filename(filename)
+        message = "ERROR: UnicodeDecodeError while reading {}".format(filename)
+        return handler.unreadable(message), errors
+    # Reinitialize the handler, resetting errors.
+    handler.set_filename(filename)
+    handler.clear_output()
+    file_errors = []
+    success = False
+    output = ""
+    for content in common.present_file_contents(filename, data):
+        if content is None:
+            continue
+        if isinstance(content, list):
+            # These are errors.
+            file_errors.extend(content)
+            continue
         # Reinitialize the handler, resetting errors.
         handler.set_filename(filename)
-        file_errors = []
-        success = False
-        for content in common.present_file_contents(filename):
-            if content is None:
-                continue
-            if isinstance(content, list):
-                # These are errors.
-                file_errors.extend(content)
-                continue
-            # Reinitialize the handler, resetting errors.
-            handler.set_filename(filename)
-            try:
-                parser.parse(content)
-            except KeyboardInterrupt:
-                sys.stderr.write("Interrupted by user.")
-                sys.exit(1)
-            except xml.sax.SAXException as error:
-                file_errors.append(error)
-                continue
-            except Exception as error:
-                file_errors.append(error)
-                continue
-            else:
-                # We have successfully parsed the file.
-                success = True
-                # We can safely print the output.
-                handler.show_output()
-                # No need for a run with another parser.
-                break
-            finally:
-                handler.clear_output()
-        # Note that the error stats of the handler get reset to zero
-        # when starting on a new document, so we ask about errors
-        # after each document.
-        if handler.has_errors():
-            # So some untranslated strings were found.
-            errors += 1
-        if success:
-            # next file
+        try:
+            parser.parse(content)
+        except KeyboardInterrupt:
+            sys.stderr.write("Interrupted by user.")
+            sys.exit(1)
+        except xml.sax.SAXException as error:
+            file_errors.append(error)
             continue
-        if file_errors:
-            errors += 1
-            report = "ERRORs found trying to parse document in various ways:\n"
-            for error in file_errors:
-                report += "%s\n" % error
-            handler.log(report, "FATAL")
+        except Exception as error:
+            file_errors.append(error)
+            continue
+        else:
+            # We have successfully parsed the file.
+            success = True
+            # We can safely use the output.
+            output = handler.get_output()
+            # No need for a run with another parser.
+            break
+        finally:
+            handler.clear_output()
+    # Note that the error stats of the handler get reset to zero
+    # when starting on a new document, so we ask about errors
+    # after each document.
+    if handler.has_errors():
+        # So some untranslated strings were found.
+        errors += 1
+    if success:
+        return output, errors
+    if file_errors:
+        errors += 1
+        report = "ERRORs found trying to parse document in various ways:\n"
+        for error in file_errors:
+            report += "%s\n" % error
+        handler.log(report, "FATAL")
+        output = handler.get_output()
+        handler.clear_output()
+    return output, errors
+
+
+# The parser and handler of a find-untranslated worker process.
+_untranslated_parser = _untranslated_handler = None
+
+
+def untranslated_worker_init(silent, nosummary, output_format="text"):
+    """Create a parser and handler once in a find-untranslated worker process."""
+    global _untranslated_parser, _untranslated_handler
+    _untranslated_parser, _untranslated_handler = make_untranslated_handler(
+        silent=silent, nosummary=nosummary, output_format=output_format
+    )
+
+
+def untranslated_worker(filename):
+    """Check one file in a find-untranslated worker process."""
+    return check_untranslated(_untranslated_parser, _untranslated_handler, filename)
+
+
+def find_untranslated(arguments):
+    files = filter_isfile(arguments.files)
+    output_format = getattr(arguments, "output_format", "text")
+    # The report depends on the options, so store it per kind of report.
+    kind = "untranslated"
+    if output_format == "json":
+        kind += "-json"
+    elif arguments.silent:
+        kind += "-silent"
+    elif arguments.nosummary:
+        kind += "-nosummary"
+    cache = None
+    if getattr(arguments, "cache_fn", None):
+        cache = ExtractionCache(arguments.cache_fn)
+    # The cache is closed, also when something goes wrong.
+    with cache or contextlib.nullcontext():
+        executor = get_executor(
+            arguments,
+            initializer=untranslated_worker_init,
+            initargs=(arguments.silent, arguments.nosummary, output_format),
+        )
+        if executor is None:
+            parser, handler = make_untranslated_handler(
+                silent=arguments.silent,
+                nosummary=arguments.nosummary,
+                output_format=output_format,
+            )
+            return report_untranslated(
+                extract.extract_files(
+                    functools.partial(check_untranslated, parser, handler),
+                    files,
+                    kind,
+                    cache=cache,
+                )
+            )
+        with executor:
+            # Without a cache, map gives the results in the order of the
+            # files, as soon as they are there.
+            return report_untranslated(
+                extract.extract_files(
+                    untranslated_worker,
+                    files,
+                    kind,
+                    cache=cache,
+                    executor=executor,
+                    chunksize=extract.TAL_CHUNKSIZE,
+                )
+            )
+
+
+def report_untranslated(results):
+    """Print the reports of the files and return the number of errors."""
+    errors = 0
+    for output, file_errors in results:
+        if output:
+            # Flush, so other programs can read the reports as they come.
+            print(output, flush=True)
+        errors += file_errors
     return errors
 
 
@@ -226,6 +423,8 @@ def rebuild_pot_parser(subparsers):
     rebuild-pot --pot <filename> --create <domain>
         [--merge <filename> [--merge2 <filename>]]
         [--exclude="<ignore1> <ignore2> ..."] path [path2 ...]
+    rebuild-pot --domains <domain1,domain2,...> --output-dir <directory>
+        [--exclude="<ignore1> <ignore2> ..."] path [path2 ...]
     """
 
     description = """
@@ -241,6 +440,14 @@ def rebuild_pot_parser(subparsers):
     domain from the Domain header in the given pot file and keep the
     headers from the file as base for a new pot file.
 
+    Instead of --pot you can give several domains with the --domains option,
+    separated by commas, and a directory with the --output-dir option.  I read
+    the files only once, and write a pot file for each domain in this
+    directory, named after the domain, for example plone.pot.  When such a
+    pot file already exists, I keep its headers.  You cannot use --merge
+    with this.  Messages in Python files go in each pot file, because I do
+    not know their domain, unless you use --resolve-domains.
+
     Note that in Python files we simply look for text within an underscore
     method: _("...").  We do not know which domain this is.
     If this finds text from a domain that you do not want to find,
@@ -251,6 +458,23 @@ def rebuild_pot_parser(subparsers):
       PMF = MessageFactory("plone")
       PMF("...")
 
+    With the --keywords option you can give the names of the functions
+    that mark messages, instead of the underscore, for example
+    --keywords="_ translate".  Calls like self.translate("...") count too.
+
+    With --python-extractor=ast the Python files are parsed with the ast
+    module instead of read token by token.  This only takes literal
+    strings, and it understands keyword arguments like msgid="..." and
+    default="..." in any order.
+
+    With --resolve-domains I find the domain of the messages in Python
+    files myself: I look for assignments like PMF = MessageFactory("plone")
+    and follow the imports of these message factories between the modules
+    that I read.  Calls of these factories are messages too, even if their
+    names are not in --keywords.  Messages for which I cannot find the
+    domain are taken to be in the domain of the pot file, or in each of the
+    --domains.
+
     If you give me an additional pot-file with the --merge <filename>
     option, I try to merge these msgids into the target-pot file
     afterwards. If a msgid already exists in the ones I found in the
@@ -272,83 +496,158 @@ def rebuild_pot_parser(subparsers):
     The default might change in the future.  If you love line numbers, you can
     add --line-numbers to be sure you keep them when you get a newer version
     of i18ndude.  If you specify both options, the last one wins.
+
+    With the --jobs option the page templates, Python files, GenericSetup
+    profiles and ZCML files are read in parallel worker processes.
+
+    With the --cache <filename> option I remember what I found in each file.
+    The next time I only read the files that have changed since then.
     """
     parser = subparsers.add_parser(
         "rebuild-pot",
-        parents=[wrapper_parser],
+        parents=[wrapper_parser, jobs_parser, pot_parser],
         formatter_class=argparse.RawDescriptionHelpFormatter,
         description=description,
     )
-    parser.add_argument("-p", "--pot", metavar="filename", dest="pot_fn", required=True)
-    parser.add_argument(
-        "-c", "--create", metavar="domain", dest="create_domain", required=False
-    )
-    parser.add_argument("-m", "--merge", metavar="filename", dest="merge_fn")
-    parser.add_argument("--merge2", metavar="filename", dest="merge2_fn")
-    parser.add_argument("--exclude", metavar='"<ignore1> <ignore2> ..."', default="")
-    # You can switch line numbers on or off.  Both options store their value
-    # in include_line_numbers.  The order is important:
-    # the last one here wins, both in this file and on the command line.
-    parser.add_argument(
-        "--no-line-numbers",
-        action="store_false",
-        dest="include_line_numbers",
-        required=False,
-    )
-    parser.add_argument(
-        "--line-numbers",
-        action="store_true",
-        dest="include_line_numbers",
-        required=False,
-    )
-    parser.add_argument("path", nargs="*")
+    parser.add_argument("--cache", metavar="filename", dest="cache_fn")
     parser.set_defaults(func=rebuild_pot)
     return parser
 
 
+def read_catalogs(reader):
+    """Let a reader read its files and return the catalogs it found.
+
+    This is used to run readers in worker processes.
+    """
+    reader.read()
+    return reader.catalogs
+
+
 def rebuild_pot(arguments):
-    merge_ctl = None
+    targets, merge_ctl, merge2_ctl = get_pot_targets(arguments)
+    cache = None
+    if arguments.cache_fn:
+        cache = ExtractionCache(arguments.cache_fn)
+    # The cache is closed, also when something goes wrong.
+    with cache or contextlib.nullcontext():
+        try:
+            readers = read_pot_messages(
+                arguments, targets, cache=cache, executor=get_executor(arguments)
+            )
+        except OSError as e:
+            short_usage(0, "I/O Error: %s" % e)
+
+    for domain, pot_fn, orig_ctl in targets:
+        if not write_pot(pot_fn, domain, orig_ctl, readers, merge_ctl, merge2_ctl):
+            message = 'No entries for domain "%s".' % domain
+            if len(targets) == 1:
+                short_usage(0, message)
+            sys.stderr.write(message + "\n")
+
+
+def get_pot_targets(arguments):
+    """Check the rebuild-pot arguments and return what we should write.
+
+    Returns a list of (domain, pot filename, original catalog) tuples,
+    and the catalogs to merge, if any.
+    """
+    merge_ctl = merge2_ctl = None
 
     # Determine final argument values.
     create_domain = arguments.create_domain
-    exclude = arguments.exclude and tuple(arguments.exclude.split()) or ()
+    domains = [domain.strip() for domain in arguments.domains.split(",")]
+    domains = [domain for domain in domains if domain]
+    output_dir = arguments.output_dir
     pot_fn = arguments.pot_fn
     merge_fn = arguments.merge_fn
     merge2_fn = arguments.merge2_fn
     if merge2_fn == merge_fn:
         merge2_fn = False
-    include_line_numbers = arguments.include_line_numbers
-    path = arguments.path
+
+    if domains:
+        if pot_fn or create_domain:
+            short_usage(1, "Use either --domains or --pot and --create.")
+        if not output_dir:
+            short_usage(1, "No output directory specified with --output-dir.")
+        if merge_fn:
+            short_usage(1, "You cannot use --merge with --domains.")
+    elif not pot_fn:
+        short_usage(1, "No pot file specified as target with --pot.")
 
     try:
-        if create_domain is not None:
-            orig_ctl = catalog.MessageCatalog(domain=create_domain)
+        # List of (domain, pot filename, original catalog).
+        targets = []
+        if domains:
+            for domain in domains:
+                target_fn = os.path.join(output_dir, domain + ".pot")
+                if os.path.exists(target_fn):
+                    orig_ctl = catalog.MessageCatalog(filename=target_fn)
+                else:
+                    orig_ctl = catalog.MessageCatalog(domain=domain)
+                targets.append((domain, target_fn, orig_ctl))
         else:
-            orig_ctl = catalog.MessageCatalog(filename=pot_fn)
-            create_domain = orig_ctl.domain
+            if create_domain is not None:
+                orig_ctl = catalog.MessageCatalog(domain=create_domain)
+            else:
+                orig_ctl = catalog.MessageCatalog(filename=pot_fn)
+            targets.append((orig_ctl.domain, pot_fn, orig_ctl))
         if merge_fn:
             merge_ctl = catalog.MessageCatalog(filename=merge_fn)
         if merge2_fn:
             merge2_ctl = catalog.MessageCatalog(filename=merge2_fn)
-        reader_args = (path, create_domain)
-        reader_kwargs = {
-            "exclude": exclude,
-            "include_line_numbers": include_line_numbers,
-        }
-        ptreader = catalog.PTReader(*reader_args, **reader_kwargs)
-        pyreader = catalog.PYReader(*reader_args, **reader_kwargs)
-        gsreader = catalog.GSReader(*reader_args, **reader_kwargs)
-        zcmlreader = catalog.ZCMLReader(*reader_args, **reader_kwargs)
     except OSError as e:
         short_usage(0, "I/O Error: %s" % e)
+    return targets, merge_ctl, merge2_ctl
+
+
+def read_pot_messages(arguments, targets, cache=None, executor=None):
+    """Read the messages for the domains of the targets.
+
+    Returns the page template, Python, GenericSetup and ZCML readers.
+    """
+    exclude = arguments.exclude and tuple(arguments.exclude.split()) or ()
+    domains = [target[0] for target in targets]
+    # Walk the directories only once for all readers.
+    index = extract.FileIndex(arguments.path, exclude=exclude)
+    reader_args = (index, domains[0])
+    reader_kwargs = {
+        "exclude": exclude,
+        "include_line_numbers": arguments.include_line_numbers,
+        "cache": cache,
+    }
+    ptreader = catalog.PTReader(*reader_args, domains=domains, **reader_kwargs)
+    pyreader = catalog.PYReader(
+        *reader_args,
+        keywords=tuple(arguments.keywords.split()),
+        extractor=arguments.python_extractor,
+        resolve_domains=arguments.resolve_domains,
+        domains=domains,
+        **reader_kwargs,
+    )
+    gsreader = catalog.GSReader(*reader_args, **reader_kwargs)
+    zcmlreader = catalog.ZCMLReader(*reader_args, **reader_kwargs)
 
     # Read the data.
-    ptreader.read()
-    pyreader.read()
-    gsreader.read()
-    zcmlreader.read()
+    if executor is None:
+        for reader in (ptreader, pyreader, gsreader, zcmlreader):
+            reader.read()
+    else:
+        with executor:
+            others = (pyreader, gsreader, zcmlreader)
+            futures = [executor.submit(read_catalogs, reader) for reader in others]
+            # The templates are divided over the same workers.
+            ptreader.read(executor=executor)
+            for reader, future in zip(others, futures):
+                reader.catalogs = future.result()
+    return ptreader, pyreader, gsreader, zcmlreader
+
 
-    domain = orig_ctl.domain
+def write_pot(pot_fn, domain, orig_ctl, readers, merge_ctl=None, merge2_ctl=None):
+    """Write the messages that the readers found for a domain to a pot file.
+
+    Returns False when there are no messages, and then nothing is written.
+    """
+    ptreader, pyreader, gsreader, zcmlreader = readers
 
     ptctl = pyctl = gsctl = zcmlctl = {}
     if domain in ptreader.catalogs:
@@ -374,7 +673,7 @@ def rebuild_pot(arguments):
         # XXX Preserve comments?
 
     if not (ptctl or pyctl or gsctl or zcmlctl):
-        short_usage(0, 'No entries for domain "%s".' % domain)
+        return False
 
     ctl = ptctl or pyctl or gsctl or zcmlctl
     if pyctl and pyctl is not ctl:
@@ -388,20 +687,99 @@ def rebuild_pot(arguments):
         # use headers from merge-catalog
         ctl.commentary_header = merge_ctl.commentary_header
         ctl.mime_header = merge_ctl.mime_header
+        ctl.encoding = merge_ctl.encoding
         # merge
         ctl.add_missing(merge_ctl, mergewarn=True)
     else:
         # use headers from orig-catalog
         ctl.commentary_header = orig_ctl.commentary_header
         ctl.mime_header = orig_ctl.mime_header
+        ctl.encoding = orig_ctl.encoding
 
-    if merge2_fn:
+    if merge2_ctl is not None:
         ctl.add_missing(merge2_ctl, mergewarn=True)
 
     ctl.mime_header["POT-Creation-Date"] = catalog.now()
-    file = open(pot_fn, "w")
-    writer = catalog.POWriter(file, ctl)
-    writer.write(msgstrToComment=True)
+    catalog.write_catalog(
+        pot_fn, ctl, ignore_headers=("POT-Creation-Date",), msgstrToComment=True
+    )
+    return True
+
+
+def watch_parser(subparsers):
+    """Argument parser for watch command.
+
+    watch --pot <filename> --create <domain>
+        [--interval <seconds>] [--poll] path [path2 ...]
+    watch --domains <domain1,domain2,...> --output-dir <directory>
+        [--interval <seconds>] [--poll] path [path2 ...]
+    """
+
+    description = """
+    Rebuild the pot file whenever a page template, Python file, GenericSetup
+    profile or ZCML file changes.  This takes the same options as the
+    rebuild-pot command, except --jobs and --cache.
+
+    I first rebuild the pot file, and then wait for changes.  What I found
+    in each file is kept in memory, so after a change I only read the changed
+    files again.  Press Ctrl-C to stop.
+
+    On Linux I use inotify to hear about changes immediately.  Elsewhere, or
+    with the --poll option, I check the modification times of the files
+    every --interval seconds, by default every second.
+    """
+    parser = subparsers.add_parser(
+        "watch",
+        parents=[wrapper_parser, pot_parser],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=description,
+    )
+    parser.add_argument(
+        "--interval", metavar="seconds", type=float, default=1.0, required=False
+    )
+    parser.add_argument("--poll", action="store_true")
+    parser.set_defaults(func=watch)
+    return parser
+
+
+def watch(arguments):
+    targets, merge_ctl, merge2_ctl = get_pot_targets(arguments)
+    exclude = arguments.exclude and tuple(arguments.exclude.split()) or ()
+    cache = MemoryCache()
+    watcher = get_watcher(
+        arguments.path,
+        exclude=exclude,
+        interval=arguments.interval,
+        poll=arguments.poll,
+    )
+    if isinstance(watcher, InotifyWatcher):
+        print("Watching for changes with inotify.  Press Ctrl-C to stop.")
+    else:
+        print(
+            "Checking for changes every %s seconds.  Press Ctrl-C to stop."
+            % arguments.interval
+        )
+    try:
+        while True:
+            start = time.monotonic()
+            try:
+                readers = read_pot_messages(arguments, targets, cache=cache)
+            except OSError as e:
+                # Probably a file was removed while we were reading.
+                sys.stderr.write("I/O Error: %s\n" % e)
+            else:
+                for domain, pot_fn, orig_ctl in targets:
+                    if not write_pot(
+                        pot_fn, domain, orig_ctl, readers, merge_ctl, merge2_ctl
+                    ):
+                        sys.stderr.write('No entries for domain "%s".\n' % domain)
+                print("Rebuilt in %.3f seconds." % (time.monotonic() - start))
+            changed = watcher.wait()
+            cache.forget(changed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
 
 
 def merge_parser(subparsers):
@@ -460,15 +838,15 @@ def merge(arguments):
     if merge2_fn:
         orig_ctl.add_missing(merge2_ctl, "", 1)
     orig_ctl.mime_header["POT-Creation-Date"] = catalog.now()
-    file = open(pot_fn, "w")
-    writer = catalog.POWriter(file, orig_ctl)
-    writer.write(msgstrToComment=True)
+    catalog.write_catalog(
+        pot_fn, orig_ctl, ignore_headers=("POT-Creation-Date",), msgstrToComment=True
+    )
 
 
 def sync_parser(subparsers):
     """Argument parser for sync command.
 
-    sync --pot <filename> file1 [file2 ...]
+    sync --pot <filename> [--jobs <number>] file1 [file2 ...]
     """
 
     description = """
@@ -476,10 +854,13 @@ def sync_parser(subparsers):
     remove from the po files those message translations of which the
     msgids are not in the pot-file and add messages that the pot-file has
     but the po-file doesn't.
+
+    With the --jobs option the po-files are handled in parallel by that
+    number of worker processes.
     """
     parser = subparsers.add_parser(
         "sync",
-        parents=[wrapper_parser],
+        parents=[wrapper_parser, jobs_parser],
         formatter_class=argparse.RawDescriptionHelpFormatter,
         description=description,
     )
@@ -491,6 +872,39 @@ def sync_parser(subparsers):
     return parser
 
 
+def sync_po(pot_ctl, po):
+    """Sync one po catalog with the pot catalog and write it.
+
+    Returns the line to report.
+    """
+    added_msgids, removed_msgids = po.sync(pot_ctl)
+
+    catalog.write_catalog(po.filename, po, msgstrToComment=False, sync=True)
+
+    return "{}: {} added, {} removed".format(
+        po.filename, len(added_msgids), len(removed_msgids)
+    )
+
+
+# The pot catalog of a sync worker process, see sync_worker_init.
+_sync_pot_ctl = None
+
+
+def sync_worker_init(pot_ctl, wrap, max_width):
+    """Keep the pot catalog that the parent process read in a sync worker."""
+    global _sync_pot_ctl
+    # The worker may not have inherited the wrapping options.
+    utils.WRAP = wrap
+    utils.MAX_WIDTH = max_width
+    _sync_pot_ctl = pot_ctl
+
+
+def sync_worker(filename):
+    """Read, sync and write one po file in a sync worker process."""
+    po = catalog.MessageCatalog(filename=filename)
+    return sync_po(_sync_pot_ctl, po)
+
+
 def sync(arguments):
     pot_fn = arguments.pot_fn
     if not pot_fn:
@@ -498,25 +912,77 @@ def sync(arguments):
 
     files = filter_isfile(arguments.files)
 
+    # Read the pot file here, also when the workers sync, so we can report
+    # a missing pot file.
     try:
         pot_ctl = catalog.MessageCatalog(filename=pot_fn)
+    except OSError as e:
+        short_usage(1, "I/O Error: %s" % e)
+
+    executor = get_executor(
+        arguments,
+        initializer=sync_worker_init,
+        initargs=(pot_ctl, utils.WRAP, utils.MAX_WIDTH),
+    )
+    if executor is not None:
+        with executor:
+            try:
+                # map gives the results in the order of the files.
+                for line in executor.map(sync_worker, files):
+                    print(line)
+            except OSError as e:
+                short_usage(1, "I/O Error: %s" % e)
+        return
+
+    try:
         po_ctls = [catalog.MessageCatalog(filename=fn) for fn in files]
     except OSError as e:
         short_usage(1, "I/O Error: %s" % e)
 
     for po in po_ctls:
-        added_msgids, removed_msgids = po.sync(pot_ctl)
+        print(sync_po(pot_ctl, po))
 
-        file = open(po.filename, "w")
-        writer = catalog.POWriter(file, po)
-        writer.write(msgstrToComment=False, sync=True)
 
-        print(
-            "{}: {} added, {} removed".format(
-                po.filename, len(added_msgids), len(removed_msgids)
+def diff_parser(subparsers):
+    """Argument parser for diff command.
+
+    diff --pot <filename> file1 [file2 ...]
+    """
+
+    description = """
+    Given a pot-file with the --pot option and a list of po-files I'll
+    show what a sync would change in each po-file, without changing it.
+
+    The result is printed as JSON: for each po-file a list of the msgids
+    that would be added, removed, and changed.  A message is changed when
+    its references or its default in the pot-file are different.
+    """
+    parser = subparsers.add_parser(
+        "diff",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=description,
+    )
+    parser.add_argument(
+        "-p", "--pot", metavar="potfilename", dest="pot_fn", required=True
+    )
+    parser.add_argument("files", nargs="+", metavar="pofilename")
+    parser.set_defaults(func=diff)
+    return parser
+
+
+def diff(arguments):
+    files = filter_isfile(arguments.files)
+    try:
+        pot_ctl = catalog.MessageCatalog(filename=arguments.pot_fn)
+        result = {}
+        for fn in files:
+            added, removed, changed = catalog.MessageCatalog(filename=fn).diff(
+                pot_ctl
             )
-        )
-        file.close()
+            result[fn] = {"added": added, "removed": removed, "changed": changed}
+    except OSError as e:
+        short_usage(1, "I/O Error: %s" % e)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
 
 
 def two_file_parser(subparsers, cmd, description):
@@ -790,8 +1256,10 @@ def main():
     # Add subparsers.
     find_untranslated_parser(subparsers)
     rebuild_pot_parser(subparsers)
+    watch_parser(subparsers)
     merge_parser(subparsers)
     sync_parser(subparsers)
+    diff_parser(subparsers)
     filter_parser(subparsers)
     admix_parser(subparsers)
     list_parser(subparsers)
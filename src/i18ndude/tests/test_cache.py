@@ -0,0 +1,115 @@
+from i18ndude.cache import ExtractionCache
+from i18ndude.cache import MemoryCache
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+
+# Names of the files that were really read.
+READ = []
+
+
+def read_file(filename):
+    READ.append(os.path.basename(filename))
+    with open(filename) as file:
+        return file.read().upper()
+
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filenames = []
+        for name in ("one.txt", "two.txt"):
+            filename = os.path.join(self.tempdir, name)
+            with open(filename, "w") as file:
+                file.write(name)
+            self.filenames.append(filename)
+        self.cache = ExtractionCache(os.path.join(self.tempdir, "cache.db"))
+        del READ[:]
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tempdir)
+
+    def extract(self, kind="test"):
+        return self.cache.extract(kind, read_file, self.filenames)
+
+    def test_extract(self):
+        self.assertEqual(self.extract(), ["ONE.TXT", "TWO.TXT"])
+        self.assertEqual(READ, ["one.txt", "two.txt"])
+        # The second time nothing needs to be read.
+        del READ[:]
+        self.assertEqual(self.extract(), ["ONE.TXT", "TWO.TXT"])
+        self.assertEqual(READ, [])
+        # The results are stored per kind of extraction.
+        self.assertEqual(self.extract(kind="other"), ["ONE.TXT", "TWO.TXT"])
+        self.assertEqual(READ, ["one.txt", "two.txt"])
+
+    def test_changed(self):
+        self.extract()
+        del READ[:]
+        with open(self.filenames[1], "w") as file:
+            file.write("changed")
+        self.assertEqual(self.extract(), ["ONE.TXT", "CHANGED"])
+        self.assertEqual(READ, ["two.txt"])
+
+    def test_touched(self):
+        self.extract()
+        del READ[:]
+        # Only the modification time changes, so the content hash matches.
+        stat = os.stat(self.filenames[0])
+        os.utime(self.filenames[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.extract(), ["ONE.TXT", "TWO.TXT"])
+        self.assertEqual(READ, [])
+
+    def test_version(self):
+        self.extract()
+        del READ[:]
+        self.cache.connection.execute("UPDATE meta SET value = 'old'")
+        self.cache.connection.commit()
+        self.cache.close()
+        # Results from another version are thrown away.
+        self.extract()
+        self.assertEqual(READ, ["one.txt", "two.txt"])
+
+    def test_context_manager(self):
+        with self.cache as cache:
+            self.assertEqual(self.extract(), ["ONE.TXT", "TWO.TXT"])
+            self.assertIsNotNone(cache._connection)
+        self.assertIsNone(self.cache._connection)
+
+    def test_pickle(self):
+        self.extract()
+        cache = pickle.loads(pickle.dumps(self.cache))
+        del READ[:]
+        self.assertEqual(
+            cache.extract("test", read_file, self.filenames), ["ONE.TXT", "TWO.TXT"]
+        )
+        self.assertEqual(READ, [])
+        cache.close()
+
+
+class TestMemoryCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, "one.txt")
+        with open(self.filename, "w") as file:
+            file.write("one")
+        self.cache = MemoryCache()
+        del READ[:]
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_extract(self):
+        extract = self.cache.extract
+        self.assertEqual(extract("test", read_file, [self.filename]), ["ONE"])
+        self.assertEqual(extract("test", read_file, [self.filename]), ["ONE"])
+        self.assertEqual(READ, ["one.txt"])
+        # A file that we forget is read again.
+        self.cache.forget([self.filename])
+        self.assertEqual(extract("test", read_file, [self.filename]), ["ONE"])
+        self.assertEqual(READ, ["one.txt", "one.txt"])
@@ -2,8 +2,11 @@ from .utils import TESTDATA_DIR
 from i18ndude import catalog
 from i18ndude import utils
 
+import io
 import os
+import pickle
 import unittest
+import unittest.mock
 import warnings
 
 
@@ -18,6 +21,25 @@ class TestGlobal(unittest.TestCase):
         self.assertTrue(i("text"), errortext)
         self.assertTrue(i("This is a text."), errortext)
 
+    def test_normalize_reference(self):
+        n = catalog.normalize_reference
+        self.assertEqual(
+            n("./browser/view.pt:3"), ("./browser/view.pt:3", "./browser/view.pt")
+        )
+        self.assertEqual(n("src/Products/CMFPlone/x.py"), ("CMFPlone/x.py",) * 2)
+        self.assertEqual(n("/home/products/foo/x.py:1")[0], "foo/x.py:1")
+        self.assertEqual(n("/home/me/src/pkg/src/pkg/x.pt:1")[0], "pkg/src/pkg/x.pt:1")
+        # Windows paths use forward slashes too.
+        n.cache_clear()
+        try:
+            with unittest.mock.patch.object(catalog.os, "sep", "\\"):
+                self.assertEqual(
+                    n("C:\\src\\pkg\\browser\\view.pt:3"),
+                    ("pkg/browser/view.pt:3", "pkg/browser/view.pt"),
+                )
+        finally:
+            n.cache_clear()
+
     def test_originalComment(self):
         self.assertEqual(
             catalog.ORIGINAL_COMMENT, " Original: ", "Wrong original comment constant"
@@ -95,6 +117,93 @@ class TestMessageEntry(unittest.TestCase):
             me2.getDefault(), self.default_text, "Default text not set correctly"
         )  # noqa
 
+    def test_empty_lists(self):
+        me1 = self.me(self.msgid)
+        me2 = self.me(self.msgid)
+        self.assertFalse(hasattr(me1, "__dict__"))
+        self.assertIsNone(me1._comments)
+        self.assertEqual(me1.comments, [])
+        me1.comments.append("A comment")
+        me1.references.append("test1.pt")
+        self.assertEqual(me1.comments, ["A comment"])
+        self.assertEqual(me1.references, ["test1.pt"])
+        # The empty lists are not shared between entries.
+        self.assertEqual(me2.comments, [])
+        self.assertEqual(me2.references, [])
+        me2.automatic_comments = ["first line"]
+        self.assertEqual(me2.automatic_comments, ["first line"])
+        me2.automatic_comments = []
+        self.assertEqual(me2.automatic_comments, [])
+        self.assertEqual(me2.references + ["test2.pt"], ["test2.pt"])
+
+    def test_lists_copied(self):
+        # An entry does not share its lists with the code that gave them.
+        references = ["test1.pt"]
+        me1 = self.me(self.msgid, references=references)
+        me1.references.append("test2.pt")
+        self.assertEqual(references, ["test1.pt"])
+        me2 = self.me(self.msgid)
+        me2.references = references
+        me2.references.append("test3.pt")
+        self.assertEqual(references, ["test1.pt"])
+
+    def test_empty_lists_write(self):
+        # Writing and comparing entries does not create lists either.
+        ctl = catalog.MessageCatalog(domain="testing")
+        ctl.add("one", msgstr="One")
+        ctl.add("two", references=["test1.pt:1"])
+        catalog.POWriter(io.StringIO(), ctl).write(sync=True)
+        self.assertEqual(ctl["one"], ctl["one"])
+        self.assertNotEqual(ctl["one"], ctl["two"])
+        self.assertIsNone(ctl["one"]._references)
+        self.assertIsNone(ctl["one"]._automatic_comments)
+        self.assertIsNone(ctl["one"]._comments)
+
+
+class TestPOParser(unittest.TestCase):
+    def parse(self, text):
+        return list(catalog.POParser(io.StringIO(text)))
+
+    def test_iter(self):
+        entries = self.parse(
+            "# comment\n"
+            "#. Original: \"orig\"\n"
+            "#: file1:3\n"
+            'msgid ""\n'
+            '"first "\n'
+            '"second"\n'
+            'msgstr "one "\n'
+            '"two"\n'
+            "\n"
+            'msgid "plain"\n'
+            'msgstr ""\n'
+        )
+        self.assertEqual(len(entries), 2)
+        entry = entries[0]
+        self.assertEqual(entry.msgid, "first second")
+        self.assertEqual(entry.msgstr, "one two")
+        self.assertEqual(entry.references, ["file1:3"])
+        self.assertEqual(entry.automatic_comments, [' Default: "orig"'])
+        self.assertEqual(entry.comments, [" comment"])
+        self.assertEqual(entries[1].msgid, "plain")
+        self.assertEqual(entries[1].msgstr, "")
+
+    def test_read_duplicates(self):
+        # A duplicate msgid in the middle of a file overrides the first one,
+        # a duplicate as last message in the file is ignored.
+        parser = catalog.POParser(
+            io.StringIO(
+                'msgid "a"\nmsgstr "1"\n'
+                'msgid "a"\nmsgstr "2"\n'
+                'msgid "b"\nmsgstr "3"\n'
+                'msgid "b"\nmsgstr "4"\n'
+            )
+        )
+        parser.read()
+        self.assertEqual(list(parser.msgdict.keys()), ["a", "b"])
+        self.assertEqual(parser.msgdict["a"].msgstr, "2")
+        self.assertEqual(parser.msgdict["b"].msgstr, "3")
+
 
 class TestMessageCatalogInit(unittest.TestCase):
     def setUp(self):
@@ -275,6 +384,25 @@ class TestMessageCatalogInit(unittest.TestCase):
                     % (test[key], self.msgids[key]),
                 )
 
+    def test_initWithLatin1File(self):
+        # The charset from the Content-Type header is used for decoding.
+        test = self.mc(filename=os.path.join(TESTDATA_DIR, "input", "latin1-de.po"))
+        self.assertEqual(test.encoding, "iso-8859-1")
+        self.assertEqual(test.domain, "latin")
+        self.assertEqual(list(test.keys()), ["label_save", "label_size"])
+        self.assertEqual(test["label_save"].msgstr, "Übernehmen")
+        self.assertEqual(test["label_size"].msgstr, "Größe")
+        self.assertEqual(test["label_save"].getDefault(), "Save")
+
+    def test_pickle(self):
+        test = self.mc(filename=self.file)
+        copy = pickle.loads(pickle.dumps(test))
+        self.assertEqual(list(copy.items()), list(test.items()))
+        self.assertEqual(copy.mime_header, test.mime_header)
+        self.assertEqual(copy.commentary_header, test.commentary_header)
+        self.assertEqual(copy.domain, test.domain)
+        self.assertEqual(copy.filename, test.filename)
+
 
 class TestMessageCatalog(unittest.TestCase):
     def setUp(self):
@@ -357,6 +485,44 @@ class TestMessageCatalog(unittest.TestCase):
             len(self.mc[msgid].references) == 2, "references missing"
         )  # noqa
 
+        # Only new references and comments are added, in their order.
+        expected = self.mc[msgid].references + ["new.pt:1", "newer.pt:2"]
+        self.mc.add(
+            msgid,
+            msgstr=msgstr,
+            comments=["one", "two"],
+            references=["new.pt:1"] + references + ["newer.pt:2"],
+        )
+        self.mc.add(msgid, msgstr=msgstr, comments=["two", "three"])
+        self.assertEqual(self.mc[msgid].references, expected)
+        self.assertEqual(self.mc[msgid].comments, ["one", "two", "three"])
+
+    def test_singleAdds(self):
+        # Readers and merges add one reference at a time.
+        references = ["first.pt:1"]
+        self.mc.add(self.msgid, references=references)
+        for number in range(1000):
+            self.mc.add(self.msgid, references=["view%d.pt:%d" % (number % 500, 1)])
+        entry = self.mc[self.msgid]
+        self.assertEqual(len(entry.references), 501)
+        self.assertEqual(entry.references[:2], ["first.pt:1", "view0.pt:1"])
+        # The list of the caller is not changed.
+        self.assertEqual(references, ["first.pt:1"])
+        # A list that was set or changed in place is checked again.
+        entry.references = ["other.pt:1"]
+        self.mc.add(self.msgid, references=["other.pt:1", "first.pt:1"])
+        self.assertEqual(entry.references, ["other.pt:1", "first.pt:1"])
+        entry.references.remove("first.pt:1")
+        self.mc.add(self.msgid, references=["first.pt:1", "other.pt:1"])
+        self.assertEqual(entry.references, ["other.pt:1", "first.pt:1"])
+        # Also when its length stays the same.
+        entry.references = []
+        self.mc.add(self.msgid, references=["a.pt:1"])
+        self.mc.add(self.msgid, references=["b.pt:1"])
+        entry.references[0] = "z.pt:1"
+        self.mc.add(self.msgid, references=["a.pt:1", "z.pt:1"])
+        self.assertEqual(entry.references, ["z.pt:1", "b.pt:1", "a.pt:1"])
+
     def test_originalComment(self):
         self.mc.add(
             self.msgid,
@@ -422,6 +588,21 @@ class TestMessageCatalogSync(unittest.TestCase):
                         % msgid,  # noqa
                     )
 
+    def test_diff(self):
+        self.pot["msgid2"].references = ["./other.pt:1"]
+        self.pot.accept_ids(["msgid1", "msgid2", "msgid3"])
+        added, removed, changed = self.po.diff(self.pot)
+        self.assertEqual(added, ["msgid3"])
+        self.assertEqual(removed, ["msgid4", "msgid5"])
+        # msgid1 has a new default, msgid2 a new reference.
+        self.assertEqual(changed, ["msgid1", "msgid2"])
+        # The diff does not change anything.
+        self.assertEqual(self.po.diff(self.pot), (added, removed, changed))
+        # This is what a sync does.
+        self.assertEqual(self.po.sync(self.pot), (["msgid3"], ["msgid4", "msgid5"]))
+        self.assertEqual(self.po.diff(self.pot), ([], [], []))
+        self.assertEqual(self.po["msgid2"].references, ["./other.pt:1"])
+
 
 class TestMessagePoWriter(unittest.TestCase):
     def setUp(self):
@@ -493,6 +674,93 @@ class TestMessagePoWriter(unittest.TestCase):
                 % (i, orig, result),
             )
 
+    def test_write_catalog(self):
+        self.assertTrue(catalog.write_catalog(self.output, self.catalog))
+        mtime = os.stat(self.output).st_mtime_ns
+        os.utime(self.output, ns=(mtime, mtime - 10**9))
+        mtime = os.stat(self.output).st_mtime_ns
+        # Writing the same catalog again leaves the file alone.
+        self.assertFalse(catalog.write_catalog(self.output, self.catalog))
+        self.assertEqual(os.stat(self.output).st_mtime_ns, mtime)
+        # A change in an ignored header does not count.
+        self.catalog.mime_header["POT-Creation-Date"] = "2000-01-01 00:00+0000"
+        self.assertTrue(catalog.write_catalog(self.output, self.catalog))
+        self.catalog.mime_header["POT-Creation-Date"] = catalog.now()
+        self.assertFalse(
+            catalog.write_catalog(
+                self.output, self.catalog, ignore_headers=("POT-Creation-Date",)
+            )
+        )
+        self.assertIn("2000-01-01", open(self.output).read())
+        # Any other change is written.
+        self.catalog.add("new", msgstr="New")
+        self.assertTrue(catalog.write_catalog(self.output, self.catalog))
+        self.assertIn('msgid "new"', open(self.output).read())
+
+    def test_write_catalog_charset(self):
+        # A latin-1 file is read and written as latin-1.
+        content = (
+            'msgid ""\n'
+            'msgstr ""\n'
+            '"Content-Type: text/plain; charset=iso-8859-1\\n"\n'
+            "\n"
+            'msgid "cafe"\n'
+            'msgstr "Caf\xe9"\n'
+        )
+        with open(self.output, "w", encoding="latin-1") as file:
+            file.write(content)
+        ctl = catalog.MessageCatalog(filename=self.output)
+        self.assertEqual(ctl["cafe"].msgstr, "Caf\xe9")
+        ctl.add("new", msgstr="Nouveau")
+        self.assertTrue(catalog.write_catalog(self.output, ctl))
+        with open(self.output, "rb") as file:
+            data = file.read()
+        self.assertIn(b'msgstr "Caf\xe9"', data)
+        self.assertIn(b"charset=iso-8859-1", data)
+        ctl = catalog.MessageCatalog(filename=self.output)
+        self.assertEqual(ctl["cafe"].msgstr, "Caf\xe9")
+        # Writing it again does not change it.
+        self.assertFalse(catalog.write_catalog(self.output, ctl))
+        # A message that latin-1 cannot hold makes it a utf-8 file.
+        ctl.add("euro", msgstr="\u20ac")
+        self.assertTrue(catalog.write_catalog(self.output, ctl))
+        with open(self.output, "rb") as file:
+            data = file.read()
+        self.assertIn('msgstr "Caf\xe9"'.encode(), data)
+        self.assertIn(b"charset=utf-8", data)
+        ctl = catalog.MessageCatalog(filename=self.output)
+        self.assertEqual(ctl["euro"].msgstr, "\u20ac")
+
+    def test_write_catalog_charset_sync(self):
+        # A sync that changes a default to one that latin-1 cannot hold
+        # still marks the translation as fuzzy.
+        content = (
+            'msgid ""\n'
+            'msgstr ""\n'
+            '"Content-Type: text/plain; charset=iso-8859-1\\n"\n'
+            '"POT-Creation-Date: 2000-01-01 00:00+0000\\n"\n'
+            "\n"
+            '#. Default: "Old"\n'
+            'msgid "price"\n'
+            'msgstr "Prix"\n'
+        )
+        with open(self.output, "w", encoding="latin-1") as file:
+            file.write(content)
+        ctl = catalog.MessageCatalog(filename=self.output)
+        pot = catalog.MessageCatalog(domain="testing")
+        pot.add("price", automatic_comments=[' Default: "New \u20ac"'])
+        pot.mime_header["POT-Creation-Date"] = catalog.now()
+        ctl.sync(pot)
+        self.assertTrue(catalog.write_catalog(self.output, ctl, sync=True))
+        with open(self.output, encoding="utf-8") as file:
+            data = file.read()
+        self.assertIn("charset=utf-8", data)
+        self.assertIn(
+            '#. Default: "New \u20ac"\n#, fuzzy\nmsgid "price"\nmsgstr "Prix"\n',
+            data,
+        )
+        self.assertNotIn('Default: "Old"', data)
+
     def tearDown(self):
         if os.path.exists(self.output):
             os.remove(self.output)
@@ -764,6 +1032,16 @@ class TestMessagePYReader(unittest.TestCase):
             )
         self.assertEqual(len(out), len(output))
 
+    def test_read_py_ast(self):
+        # The ast extractor gives the same result as the tokenize one.
+        dirpath = os.path.join(TESTDATA_DIR, "input")
+        pyr = catalog.PYReader(dirpath, "testing")
+        pyr.read()
+        astr = catalog.PYReader(dirpath, "testing", extractor="ast")
+        astr.read()
+        self.assertEqual(astr.catalogs["testing"], pyr.catalogs["testing"])
+        self.assertEqual(len(astr.catalogs["testing"]), 6)
+
 
 class TestMessageGSReader(unittest.TestCase):
     def test_read_no_line_numbers(self):
@@ -886,6 +1164,7 @@ def test_suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestGlobal))
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestMessageEntry))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestPOParser))
     suite.addTest(
         unittest.defaultTestLoader.loadTestsFromTestCase(TestMessageCatalogInit)
     )
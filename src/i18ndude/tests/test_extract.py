@@ -1,9 +1,232 @@
 """Tests for the message string extraction tool.
 """
 
+from .utils import PACKAGE_HOME
+from .utils import suppress_stdout
+from .utils import TESTDATA_DIR
 from doctest import DocTestSuite
+from i18ndude import catalog
+from i18ndude import extract
+from i18ndude.extract import find_files
+from zope.i18nmessageid import Message
 
+import concurrent.futures
+import contextlib
+import io
+import os
+import shutil
+import tempfile
 import unittest
+import warnings
+
+
+class TestFileIndex(unittest.TestCase):
+    def test_find(self):
+        self.assertEqual(
+            extract.FileIndex(PACKAGE_HOME).find("*.zcml"),
+            [os.path.join(TESTDATA_DIR, "input", "test.zcml")],
+        )
+        index = extract.FileIndex(PACKAGE_HOME, exclude=("testdata",))
+        self.assertEqual(index.find("*.zcml"), [])
+        # The excluded directory is not in the index at all.
+        for files in index.buckets.values():
+            for dirpath, name in files:
+                self.assertNotIn("testdata", dirpath)
+        # Extra excludes can be passed when searching.
+        self.assertEqual(
+            index.find("*.py", exclude=("testdata", "tests", "*extract.py")),
+            find_files(
+                PACKAGE_HOME, "*.py", exclude=("testdata", "tests", "*extract.py")
+            ),
+        )
+        self.assertNotIn(
+            os.path.join(PACKAGE_HOME, "tests", "test_extract.py"),
+            index.find("*.py", exclude=("tests",)),
+        )
+
+    def test_find_files(self):
+        index = extract.FileIndex(PACKAGE_HOME)
+        for pattern in ("*.*pt", "*.*py", "*.xml", "*.zcml", "*.pot"):
+            self.assertEqual(
+                find_files(index, pattern, exclude=("tests",)),
+                find_files(PACKAGE_HOME, pattern, exclude=("tests",)),
+            )
+        # Files can be passed explicitly.
+        filename = os.path.join(TESTDATA_DIR, "input", "test1.pt")
+        self.assertEqual(find_files([filename], "*.*pt"), [filename])
+        self.assertEqual(find_files([filename], "*.py"), [])
+
+
+class TestTokenEater(unittest.TestCase):
+    def test_different_default(self):
+        eater = extract.TokenEater()
+        eater.add_entry("one.py", "a", "A", 1)
+        eater.add_entry("one.py", "b", None, 2)
+        eater.add_entry("two.py", "a", "A", 3)
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            eater.add_entry("two.py", "a", "Other", 4)
+        self.assertIn("in two.py:4 already exists", stderr.getvalue())
+        self.assertIn("(bad: Other, should be: A)", stderr.getvalue())
+        catalog = eater.getCatalog()
+        self.assertEqual(
+            catalog,
+            {
+                "a": [("one.py", 1), ("two.py", 3), ("two.py", 4)],
+                "b": [("one.py", 2)],
+            },
+        )
+        # The first default wins.
+        self.assertEqual([key for key in catalog if key == "a"][0].default, "A")
+
+
+class TestPyStrings(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        with open(os.path.join(self.tempdir, "module.py"), "w") as module:
+            module.write(
+                "_('underscore')\n"
+                "PMF('plone', default='Plone')\n"
+                "self.translate('method')\n"
+                "_(kwargs.get('title', 'not a message'))\n"
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_keywords(self):
+        for extractor in extract.PYTHON_EXTRACTORS:
+            catalog = extract.py_strings(self.tempdir, extractor=extractor)
+            self.assertIn("underscore", catalog)
+            self.assertNotIn("plone", catalog)
+            catalog = extract.py_strings(
+                self.tempdir, keywords=("PMF", "translate"), extractor=extractor
+            )
+            self.assertEqual(sorted(catalog), ["method", "plone"])
+            self.assertEqual(
+                catalog["plone"], [(os.path.join(self.tempdir, "module.py"), 2)]
+            )
+            self.assertEqual([key.default for key in catalog], ["Plone", None])
+
+    def test_ast_literal_strings(self):
+        # Only the ast extractor knows that this is no message.
+        catalog = extract.py_strings(self.tempdir, extractor="tokenize")
+        self.assertIn("title", catalog)
+        catalog = extract.py_strings(self.tempdir, extractor="ast")
+        self.assertEqual(list(catalog), ["underscore"])
+
+
+class TestPyDomainStrings(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        files = {
+            ("mypkg", "__init__.py"): (
+                "from zope.i18nmessageid import MessageFactory\n"
+                "_ = MessageFactory('mypkg')\n"
+            ),
+            ("mypkg", "i18n.py"): (
+                "from zope.i18nmessageid import MessageFactory as MF\n"
+                "PMF = MF('plone')\n"
+            ),
+            ("mypkg", "browser", "__init__.py"): "",
+            ("mypkg", "browser", "view.py"): (
+                "from .. import _\n"
+                "from ..i18n import PMF\n"
+                "from mypkg.i18n import PMF as PloneMF\n"
+                "from Products.CMFPlone import PloneMessageFactory\n"
+                "from os.path import join\n"
+                "_('own')\n"
+                "PMF('save', default='Save')\n"
+                "PloneMF('cancel')\n"
+                "PloneMessageFactory('unknown')\n"
+                "join('not', 'a message')\n"
+                "self._('attribute')\n"
+            ),
+        }
+        for path, content in files.items():
+            filename = os.path.join(self.tempdir, *path)
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, "w") as module:
+                module.write(content)
+        self.view = os.path.join(self.tempdir, "mypkg", "browser", "view.py")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_module_name(self):
+        self.assertEqual(extract.module_name(self.view), ("mypkg.browser.view", False))
+        self.assertEqual(
+            extract.module_name(os.path.join(self.tempdir, "mypkg", "__init__.py")),
+            ("mypkg", True),
+        )
+
+    def test_domains(self):
+        catalogs = extract.py_domain_strings(self.tempdir, domains=("testing",))
+        self.assertEqual(sorted(catalogs), ["mypkg", "plone", "testing"])
+        self.assertEqual(catalogs["mypkg"], {"own": [(self.view, 6)]})
+        self.assertEqual(
+            catalogs["plone"], {"save": [(self.view, 7)], "cancel": [(self.view, 8)]}
+        )
+        self.assertEqual([key.default for key in catalogs["plone"]], ["Save", None])
+        # We cannot find the domain of a keyword called as attribute.
+        self.assertEqual(catalogs["testing"], {"attribute": [(self.view, 11)]})
+
+    def test_reader(self):
+        reader = catalog.PYReader(self.tempdir, "testing", resolve_domains=True)
+        reader.read()
+        self.assertEqual(sorted(reader.catalogs), ["mypkg", "plone", "testing"])
+        self.assertEqual(sorted(reader.catalogs["plone"]), ["cancel", "save"])
+        # Without resolving, everything is in our domain.
+        reader = catalog.PYReader(self.tempdir, "testing")
+        reader.read()
+        self.assertEqual(list(reader.catalogs), ["testing"])
+        self.assertEqual(sorted(reader.catalogs["testing"]), ["attribute", "own"])
+
+
+class TestTalStrings(unittest.TestCase):
+    def test_executor(self):
+        # Reading the templates in worker processes gives the same result.
+        path = os.path.join(TESTDATA_DIR, "input")
+        with warnings.catch_warnings(), suppress_stdout():
+            warnings.simplefilter("ignore")
+            serial = extract.tal_strings(path, domain="testing")
+            with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+                parallel = extract.tal_strings(
+                    path, domain="testing", executor=executor
+                )
+        self.assertTrue(serial)
+        self.assertEqual(list(parallel.items()), list(serial.items()))
+        for msgid in serial:
+            self.assertEqual(
+                [key for key in parallel if key == msgid][0].default, msgid.default
+            )
+
+    def test_merge_tal_catalogs(self):
+        first = {"plone": {Message("a", default="A"): [("one.pt", (1, 0))]}}
+        second = {
+            "plone": {
+                Message("b"): [("two.pt", (1, 0))],
+                Message("a", default="Other"): [("two.pt", (2, 0))],
+            },
+            "other": {Message("c"): [("two.pt", (3, 0))]},
+        }
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            result = extract.merge_tal_catalogs([first, second])
+        self.assertEqual(
+            result["plone"],
+            {
+                "a": [("one.pt", (1, 0)), ("two.pt", (2, 0))],
+                "b": [("two.pt", (1, 0))],
+            },
+        )
+        self.assertEqual(result["other"], {"c": [("two.pt", (3, 0))]})
+        # The first default wins, and we are warned about the other one.
+        self.assertEqual(list(result["plone"])[0].default, "A")
+        self.assertEqual(len(caught), 1)
+        self.assertIn("already exists with a different default", str(caught[0].message))
+        # The input is not changed.
+        self.assertEqual(first["plone"]["a"], [("one.pt", (1, 0))])
 
 
 def test_suite():
@@ -0,0 +1,213 @@
+from .utils import suppress_stdout
+from .utils import TESTDATA_DIR
+from i18ndude import script
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.pot = os.path.join(TESTDATA_DIR, "input", "synctest.pot")
+        self.serial = []
+        self.parallel = []
+        for name in ("synctest-de.po", "test-en.po"):
+            source = os.path.join(TESTDATA_DIR, "input", name)
+            for kind, files in (("serial", self.serial), ("parallel", self.parallel)):
+                target = os.path.join(self.tempdir, f"{kind}-{name}")
+                shutil.copy(source, target)
+                files.append(target)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def sync(self, files, jobs):
+        arguments = argparse.Namespace(pot_fn=self.pot, files=files, jobs=jobs)
+        with suppress_stdout():
+            script.sync(arguments)
+
+    def test_sync_jobs(self):
+        # Syncing in worker processes gives the same result.
+        self.sync(self.serial, jobs=1)
+        self.sync(self.parallel, jobs=2)
+        for serial, parallel in zip(self.serial, self.parallel):
+            with open(serial) as f1, open(parallel) as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+    def test_sync_missing_pot(self):
+        # A missing pot file gives the usage message, also with workers.
+        self.pot = os.path.join(self.tempdir, "missing.pot")
+        for jobs in (1, 2):
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                with self.assertRaises(SystemExit) as raised:
+                    self.sync(self.parallel, jobs=jobs)
+            self.assertEqual(raised.exception.code, 1)
+            self.assertIn("I/O Error", stderr.getvalue())
+
+
+class TestDiff(unittest.TestCase):
+    def test_diff(self):
+        pot = os.path.join(TESTDATA_DIR, "input", "synctest.pot")
+        po = os.path.join(TESTDATA_DIR, "input", "synctest-de.po")
+        arguments = argparse.Namespace(pot_fn=pot, files=[po])
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            script.diff(arguments)
+        self.assertEqual(
+            json.loads(stdout.getvalue()),
+            {po: {"added": ["msgid3"], "removed": [], "changed": ["msgid1"]}},
+        )
+
+
+def parse_arguments(args):
+    """Parse the arguments like the i18ndude script does."""
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers()
+    script.rebuild_pot_parser(subparsers)
+    script.watch_parser(subparsers)
+    return parser.parse_args(args)
+
+
+class TestRebuildPot(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(TESTDATA_DIR, "input")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def read_pot(self, pot_fn):
+        with open(pot_fn) as pot:
+            # Ignore the creation date.
+            return [line for line in pot if "POT-Creation-Date" not in line]
+
+    def rebuild_pot(self, *options, domain="testing"):
+        pot_fn = os.path.join(self.tempdir, domain + "-single.pot")
+        arguments = parse_arguments(
+            ["rebuild-pot", "--pot", pot_fn, "--create", domain, self.path]
+            + list(options)
+        )
+        with suppress_stdout():
+            script.rebuild_pot(arguments)
+        return self.read_pot(pot_fn)
+
+    def test_rebuild_pot_jobs(self):
+        # Reading in worker processes gives the same result.
+        serial = self.rebuild_pot()
+        self.assertIn('msgid "Buzz"\n', serial)
+        self.assertEqual(self.rebuild_pot("--jobs", "4"), serial)
+
+    def test_rebuild_pot_jobs_negative(self):
+        options = ["rebuild-pot", "--pot", "x.pot", "--create", "x", self.path]
+        self.assertEqual(parse_arguments(options + ["--jobs", "0"]).jobs, 0)
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            with self.assertRaises(SystemExit):
+                parse_arguments(options + ["--jobs", "-1"])
+        self.assertIn("must be 0 or more, not -1", stderr.getvalue())
+
+    def test_rebuild_pot_ast(self):
+        # For the test data both Python extractors give the same result.
+        serial = self.rebuild_pot()
+        self.assertEqual(self.rebuild_pot("--python-extractor", "ast"), serial)
+
+    def test_rebuild_pot_cache(self):
+        # Results from the cache give the same pot file.
+        serial = self.rebuild_pot()
+        cache_fn = os.path.join(self.tempdir, "cache.db")
+        self.assertEqual(self.rebuild_pot("--cache", cache_fn), serial)
+        self.assertTrue(os.path.exists(cache_fn))
+        self.assertEqual(self.rebuild_pot("--cache", cache_fn), serial)
+        self.assertEqual(self.rebuild_pot("--cache", cache_fn, "-j", "4"), serial)
+
+    def rebuild_pots(self, domains, *options):
+        output_dir = os.path.join(self.tempdir, "output")
+        os.makedirs(output_dir, exist_ok=True)
+        arguments = parse_arguments(
+            ["rebuild-pot", "--domains", domains, "--output-dir", output_dir]
+            + list(options)
+            + [self.path]
+        )
+        stderr = io.StringIO()
+        with suppress_stdout(), contextlib.redirect_stderr(stderr):
+            script.rebuild_pot(arguments)
+        pots = {}
+        for name in os.listdir(output_dir):
+            pots[name] = self.read_pot(os.path.join(output_dir, name))
+            os.remove(os.path.join(output_dir, name))
+        return pots, stderr.getvalue()
+
+    def test_rebuild_pot_domains(self):
+        # One run for several domains gives the same pot files as one run
+        # for each domain.  Python messages are in all of them.
+        domains = ("testing", "plone", "nothing")
+        expected = {
+            domain + ".pot": self.rebuild_pot(domain=domain) for domain in domains
+        }
+        self.assertIn('msgid "Buzz"\n', expected["testing.pot"])
+        self.assertIn('msgid "Print this"\n', expected["plone.pot"])
+        pots, errors = self.rebuild_pots(",".join(domains))
+        self.assertEqual(pots, expected)
+        # No pot file is written for a domain without messages.
+        pots, errors = self.rebuild_pots("plone,nothing", "--exclude", "test2.py")
+        self.assertEqual(list(pots), ["plone.pot"])
+        self.assertIn('No entries for domain "nothing".', errors)
+
+
+class FakeWatcher:
+    """Watcher that changes a file once, and then stops the watch command."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.waited = 0
+
+    def wait(self):
+        self.waited += 1
+        if self.waited > 1:
+            raise KeyboardInterrupt
+        with open(self.filename) as file:
+            content = file.read()
+        with open(self.filename, "w") as file:
+            file.write(content.replace("Buzz", "Fizzbuzz"))
+        return {self.filename}
+
+    def close(self):
+        pass
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "input")
+        shutil.copytree(os.path.join(TESTDATA_DIR, "input"), self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def read_pot(self, command):
+        pot_fn = os.path.join(self.tempdir, command + ".pot")
+        arguments = parse_arguments(
+            [command, "--pot", pot_fn, "--create", "testing", self.path]
+        )
+        with suppress_stdout():
+            arguments.func(arguments)
+        with open(pot_fn) as pot:
+            return [line for line in pot if "POT-Creation-Date" not in line]
+
+    def test_watch(self):
+        watcher = FakeWatcher(os.path.join(self.path, "test1.pt"))
+        with unittest.mock.patch.object(script, "get_watcher", return_value=watcher):
+            pot = self.read_pot("watch")
+        self.assertEqual(watcher.waited, 2)
+        # The pot file is the same as when we rebuild it after the change.
+        self.assertIn('msgid "Fizzbuzz"\n', pot)
+        self.assertEqual(pot, self.read_pot("rebuild-pot"))
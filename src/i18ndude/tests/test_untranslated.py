@@ -1,15 +1,24 @@
 """Tests for finding untranslated prose."""
 
 from argparse import Namespace
+from i18ndude.cache import ExtractionCache
 from i18ndude.script import find_untranslated as script
 from i18ndude.tests.utils import suppress_stdout
 from i18ndude.tests.utils import TESTDATA_DIR
 
+import contextlib
+import i18ndude.script
 import i18ndude.untranslated
 import io
+import json
+import lxml.etree
 import os
+import re
+import shutil
 import sys
+import tempfile
 import unittest
+import unittest.mock
 import xml.sax
 
 
@@ -34,6 +43,17 @@ class TestUntranslated(unittest.TestCase):
         )
         self.assertIn("(0 warnings, 1 errors)", result_with_errors)
 
+    def test_untranslated_content_in_chunks(self):
+        """
+        The parser gives text with lines and entities in several chunks.
+        These are reported as one message.
+        """
+        result = find_untranslated("<div><p>foo &amp;\nbar\n&lt;baz&gt;</p></div>")
+        self.assertIn('"""\nfoo &\nbar\n<baz>\n"""', result)
+        self.assertIn("(0 warnings, 1 errors)", result)
+        result = find_untranslated("<div><p>1 &amp;\n2</p></div>")
+        self.assertIn("(0 warnings, 0 errors)", result)
+
     def test_untranslated(self):
         """
         find-untranslated finds no error if the i18n:translate marker is set.
@@ -151,6 +171,81 @@ class TestUntranslated(unittest.TestCase):
         self.assertIn("0 errors", result_with_dash_in_name)
 
 
+class TestTemplateParser(unittest.TestCase):
+    def check(self, source):
+        out = io.StringIO()
+        parser = i18ndude.untranslated.TemplateParser()
+        parser.setContentHandler(i18ndude.untranslated.VerboseHandler(parser, out))
+        parser.parse(source)
+        return out.getvalue()
+
+    def test_tree(self):
+        # Walking an lxml tree gives the same report as parsing the xml.
+        template = (
+            '<div xmlns:i18n="http://xml.zope.org/namespaces/i18n"'
+            ' xmlns:tal="http://xml.zope.org/namespaces/tal" xml:lang="en">\n'
+            "<p>Some <b>bold</b><!-- comment --> text</p>\n"
+            '<p i18n:translate="">ok <span tal:replace="x">y</span></p>\n'
+            '<img title="A title" alt="An image" i18n:attributes="alt" />\n'
+            "<?pi instruction?>tail</div>"
+        )
+        expected = self.check(io.StringIO(template))
+        self.assertIn('"""\nSome  text\n"""', expected)
+        self.assertIn('"""\ntail\n"""', expected)
+        self.assertIn("title attribute of <img> lacks", expected)
+        self.assertIn("(0 warnings, 4 errors)", expected)
+        tree = lxml.etree.parse(io.BytesIO(template.encode()))
+        result = self.check(tree)
+        # We only know the line of the element, not the column.
+        self.assertIn("Undefined:2:0:", result)
+        position = re.compile(r"Undefined:\d+:\d+:")
+        self.assertEqual(position.sub("", result), position.sub("", expected))
+
+    def test_deep_tree(self):
+        # Nesting deeper than the recursion limit is fine.
+        depth = sys.getrecursionlimit() + 100
+        root = element = lxml.etree.Element("div")
+        for number in range(depth):
+            element = lxml.etree.SubElement(element, "div")
+            element.tail = "after %d" % number
+        element.text = "deepest"
+        result = self.check(lxml.etree.ElementTree(root))
+        self.assertIn('"""\ndeepest\n"""', result)
+        self.assertIn('"""\nafter %d\n"""' % (depth - 1), result)
+        self.assertIn("(0 warnings, %d errors)" % (depth + 1), result)
+
+
+class TestJSONLinesHandler(unittest.TestCase):
+    def test_findings(self):
+        out = io.StringIO()
+        parser = xml.sax.make_parser(["expat"])
+        handler = i18ndude.untranslated.JSONLinesHandler(parser, out)
+        handler.set_filename("test.pt")
+        parser.setContentHandler(handler)
+        parser.parse(io.StringIO('<div>\n<p title="bar">foo</p></div>'))
+        findings = [json.loads(line) for line in handler.get_output().splitlines()]
+        self.assertEqual(
+            findings,
+            [
+                {
+                    "filename": "test.pt",
+                    "line": 2,
+                    "column": 0,
+                    "severity": "ERROR",
+                    "message": "title attribute of <p> lacks i18n:attributes",
+                },
+                {
+                    "filename": "test.pt",
+                    "line": 2,
+                    "column": 18,
+                    "severity": "ERROR",
+                    "message": 'i18n:translate missing for this:\n"""\nfoo\n"""',
+                },
+            ],
+        )
+        self.assertTrue(handler.has_errors())
+
+
 class TestUntranslatedScript(unittest.TestCase):
     def test_script_template_1(self):
         path = os.path.join(TESTDATA_DIR, "input", "test1.pt")
@@ -199,3 +294,99 @@ class TestUntranslatedScript(unittest.TestCase):
             result = script(Namespace(silent=False, nosummary=True, files=[path]))
 
         self.assertEqual(result, 0)
+
+    def test_script_jobs(self):
+        # Checking in worker processes gives the same reports, in the same order.
+        path = os.path.join(TESTDATA_DIR, "input")
+        outputs = []
+        for jobs in (1, 2):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                result = script(
+                    Namespace(silent=False, nosummary=False, files=[path], jobs=jobs)
+                )
+            self.assertEqual(result, 2)
+            outputs.append(output.getvalue())
+        self.assertIn("Processing of", outputs[0])
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_script_cache(self):
+        path = os.path.join(TESTDATA_DIR, "input")
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        arguments = Namespace(
+            silent=False,
+            nosummary=False,
+            files=[path],
+            cache_fn=os.path.join(tempdir, "cache.db"),
+        )
+        outputs = []
+        # The second time no file may be checked.
+        not_called = unittest.mock.Mock(side_effect=AssertionError("checked"))
+        for check in (i18ndude.script.check_untranslated, not_called):
+            output = io.StringIO()
+            with unittest.mock.patch("i18ndude.script.check_untranslated", check):
+                with contextlib.redirect_stdout(output):
+                    result = script(arguments)
+            self.assertEqual(result, 2)
+            outputs.append(output.getvalue())
+        # The report from the cache is the same.
+        self.assertIn("Processing of", outputs[0])
+        self.assertEqual(outputs[0], outputs[1])
+        # Another kind of report is not taken from the cache.
+        output = io.StringIO()
+        arguments.silent = True
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(script(arguments), 2)
+        self.assertNotEqual(output.getvalue(), outputs[0])
+
+    def test_script_cache_closed(self):
+        # The cache is closed when starting the workers or checking fails.
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        arguments = Namespace(
+            silent=False,
+            nosummary=False,
+            files=[os.path.join(TESTDATA_DIR, "input")],
+            cache_fn=os.path.join(tempdir, "cache.db"),
+        )
+        failing = unittest.mock.Mock(side_effect=RuntimeError("broken"))
+        for name in ("get_executor", "check_untranslated"):
+            close = unittest.mock.patch.object(
+                ExtractionCache,
+                "close",
+                autospec=True,
+                side_effect=ExtractionCache.close,
+            )
+            with unittest.mock.patch("i18ndude.script." + name, failing):
+                with close as closed:
+                    with self.assertRaises(RuntimeError):
+                        script(arguments)
+            closed.assert_called_once()
+
+    def test_script_json(self):
+        path = os.path.join(TESTDATA_DIR, "input")
+        outputs = []
+        for jobs in (1, 2):
+            output = io.StringIO()
+            arguments = Namespace(
+                silent=False,
+                nosummary=False,
+                files=[path],
+                jobs=jobs,
+                output_format="json",
+            )
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(script(arguments), 2)
+            outputs.append(output.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+        # Each line is one finding.
+        findings = [json.loads(line) for line in outputs[0].splitlines()]
+        self.assertTrue(findings)
+        self.assertEqual(
+            {finding["filename"] for finding in findings},
+            {os.path.join(path, "test3.pt"), os.path.join(path, "test4.pt")},
+        )
+        for finding in findings:
+            self.assertEqual(finding["severity"], "ERROR")
+            self.assertIsInstance(finding["line"], int)
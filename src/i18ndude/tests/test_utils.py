@@ -125,6 +125,14 @@ class TestUndoubleEscape(unittest.TestCase):
         goodname = "Kılıçaslan"
         self.assertEqual(undouble_unicode_escape(garbled), goodname)
 
+    def test_plain_strings_unchanged(self):
+        # These take the fast path.
+        for value in ("", "foo", "äöüß text", "Kılıçaslan", "送信"):
+            self.assertIs(undouble_unicode_escape(value), value)
+
+    def test_escaped(self):
+        self.assertEqual(undouble_unicode_escape("\\u9001\\u4fe1"), "送信")
+
     def test_object(self):
         NO_VALUE = object()
         self.assertEqual(undouble_unicode_escape(NO_VALUE), NO_VALUE)
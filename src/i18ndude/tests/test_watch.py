@@ -0,0 +1,106 @@
+from i18ndude import watch
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+
+class WatcherTests:
+    """Tests for both kinds of watchers."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.tempdir, "skins"))
+        os.mkdir(os.path.join(self.tempdir, "tests"))
+        self.template = os.path.join(self.tempdir, "skins", "view.pt")
+        self.write(self.template, "<p>Hello</p>")
+        self.watcher = self.make_watcher()
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.tempdir)
+
+    def write(self, filename, content):
+        with open(filename, "w") as file:
+            file.write(content)
+        # Make sure the modification time changes for the polling watcher.
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_changed(self):
+        self.assertEqual(self.watcher.wait(timeout=0.1), set())
+        self.write(self.template, "<p>Hello world</p>")
+        self.assertEqual(self.watcher.wait(timeout=5), {self.template})
+
+    def test_new_and_removed(self):
+        module = os.path.join(self.tempdir, "module.py")
+        self.write(module, "_('Hello')")
+        self.assertEqual(self.watcher.wait(timeout=5), {module})
+        os.remove(module)
+        self.assertEqual(self.watcher.wait(timeout=5), {module})
+
+    def test_ignored(self):
+        # Other files and excluded directories do not matter.
+        self.write(os.path.join(self.tempdir, "README.txt"), "Read me")
+        self.write(os.path.join(self.tempdir, "tests", "test.pt"), "<p>Test</p>")
+        self.assertEqual(self.watcher.wait(timeout=0.3), set())
+
+    def test_files_and_directories(self):
+        # Watch a directory, and a file in another directory.
+        self.watcher.close()
+        module = os.path.join(self.tempdir, "tests", "module.py")
+        other = os.path.join(self.tempdir, "tests", "other.py")
+        self.write(module, "_('Hello')")
+        self.write(other, "_('Other')")
+        self.watcher = self.make_watcher([os.path.join(self.tempdir, "skins"), module])
+        self.write(self.template, "<p>Hello world</p>")
+        self.assertEqual(self.watcher.wait(timeout=5), {self.template})
+        self.write(module, "_('Hello world')")
+        self.assertEqual(self.watcher.wait(timeout=5), {module})
+        self.write(other, "_('Other world')")
+        self.assertEqual(self.watcher.wait(timeout=0.3), set())
+
+
+class TestPollingWatcher(WatcherTests, unittest.TestCase):
+    def make_watcher(self, paths=None):
+        return watch.PollingWatcher(
+            paths or self.tempdir, exclude=("tests",), interval=0.01
+        )
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify needs Linux")
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+    def make_watcher(self, paths=None):
+        return watch.InotifyWatcher(paths or self.tempdir, exclude=("tests",))
+
+    def test_new_directory(self):
+        directory = os.path.join(self.tempdir, "browser")
+        os.mkdir(directory)
+        self.watcher.wait(timeout=0.1)
+        # Files in the new directory are watched too.
+        template = os.path.join(directory, "page.pt")
+        self.write(template, "<p>Page</p>")
+        self.assertEqual(self.watcher.wait(timeout=5), {template})
+
+    def test_new_directory_with_files(self):
+        # New directories are watched when files were passed as well.
+        self.watcher.close()
+        module = os.path.join(self.tempdir, "module.py")
+        self.write(module, "_('Hello')")
+        skins = os.path.join(self.tempdir, "skins")
+        self.watcher = self.make_watcher([skins, module])
+        directory = os.path.join(skins, "browser")
+        os.mkdir(directory)
+        self.watcher.wait(timeout=0.1)
+        template = os.path.join(directory, "page.pt")
+        self.write(template, "<p>Page</p>")
+        self.assertEqual(self.watcher.wait(timeout=5), {template})
+
+
+class TestGetWatcher(unittest.TestCase):
+    def test_poll(self):
+        watcher = watch.get_watcher(tempfile.gettempdir(), poll=True, interval=2)
+        self.assertIsInstance(watcher, watch.PollingWatcher)
+        self.assertEqual(watcher.interval, 2)
@@ -1,4 +1,7 @@
+from lxml import etree
+
 import io
+import json
 import re
 import xml.sax
 
@@ -12,10 +15,8 @@ NOT_ALLOWED_IN_NAME = re.compile(r"[^\w-]")
 def _translatable(data):
     """Returns 1 for strings that contain alphanumeric characters."""
 
-    for ch in data:
-        if ch.isalpha():
-            return 1
-    return 0
+    # This stops at the first letter, without a Python loop.
+    return int(any(map(str.isalpha, data)))
 
 
 def _severity(tag, attrs):
@@ -167,6 +168,102 @@ def attr_validator(tag, attrs, logfct):
         )
 
 
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+
+class TemplateParser:
+    """Parser that gives the contents of a template to a handler.
+
+    This has the part of the xml.sax parser interface that our handlers
+    use.  ``parse`` takes a file with xml, which an expat SAX parser reads,
+    or a tree that lxml has already parsed.  We walk the tree and call the
+    handler like the SAX parser would, instead of serializing the tree and
+    parsing it again.  Namespace declarations are not passed as attributes,
+    because the handlers do not look at them.
+    """
+
+    def __init__(self):
+        self._sax_parser = xml.sax.make_parser(["expat"])
+        # disable external validation to make it work without network access
+        self._sax_parser.setFeature(xml.sax.handler.feature_external_ges, False)
+        self._sax_parser.setFeature(xml.sax.handler.feature_external_pes, False)
+        self._handler = None
+        # Line of the element we are at in a tree, or None for the SAX parser.
+        self._line = None
+
+    def setContentHandler(self, handler):
+        self._handler = handler
+        self._sax_parser.setContentHandler(handler)
+
+    def getLineNumber(self):
+        if self._line is None:
+            return self._sax_parser.getLineNumber()
+        return self._line
+
+    def getColumnNumber(self):
+        if self._line is None:
+            return self._sax_parser.getColumnNumber()
+        # lxml does not know the column.
+        return 0
+
+    def parse(self, source):
+        if not hasattr(source, "getroot"):
+            self._line = None
+            self._sax_parser.parse(source)
+            return
+        self._line = 0
+        self._handler.startDocument()
+        self._walk(source.getroot())
+        self._handler.endDocument()
+
+    def _walk(self, root):
+        handler = self._handler
+        # We keep a stack of the open elements and the iterators over their
+        # children, instead of recursing, so deeply nested trees work too.
+        stack = [(root, self._start(root), iter(root))]
+        while stack:
+            element, tag, children = stack[-1]
+            for child in children:
+                # Comments and processing instructions have no string tag.
+                # Like SAX, we skip them, except for the text after them.
+                if isinstance(child.tag, str):
+                    stack.append((child, self._start(child), iter(child)))
+                    break
+                if child.tail:
+                    handler.characters(child.tail)
+            else:
+                stack.pop()
+                handler.endElement(tag)
+                if stack and element.tail:
+                    handler.characters(element.tail)
+
+    def _start(self, element):
+        """Start an element and its text, and return its tag."""
+        self._line = element.sourceline or 0
+        tag = element.tag
+        if tag[0] == "{":
+            tag = etree.QName(tag).localname
+            if element.prefix:
+                tag = "%s:%s" % (element.prefix, tag)
+        attrs = {}
+        prefixes = None
+        for name, value in element.attrib.items():
+            if name[0] == "{":
+                if prefixes is None:
+                    prefixes = {uri: prefix for prefix, uri in element.nsmap.items()}
+                    prefixes[XML_NAMESPACE] = "xml"
+                qname = etree.QName(name)
+                prefix = prefixes.get(qname.namespace)
+                name = qname.localname
+                if prefix:
+                    name = "%s:%s" % (prefix, name)
+            attrs[name] = value
+        self._handler.startElement(tag, attrs)
+        if element.text:
+            self._handler.characters(element.text)
+        return tag
+
+
 class Handler(xml.sax.ContentHandler):
     def __init__(self, parser, out=None):
         self._parser = parser
@@ -176,16 +273,27 @@ class Handler(xml.sax.ContentHandler):
             self._out = out
         self._filename = "Undefined"
 
-    def show_output(self):
+    def get_output(self):
+        """Return the output, followed by an empty line, or an empty string."""
         value = self._out.getvalue().strip()
+        if not value:
+            return ""
+        if not isinstance(value, str):
+            value = value.decode("utf-8")
+        return value + "\n"
+
+    def unreadable(self, message):
+        """Return the report for a file that we cannot read."""
+        return message
+
+    def show_output(self):
+        value = self.get_output()
         if value:
-            if not isinstance(value, str):
-                value = value.decode("utf-8")
             # Note: if value contains non-ascii and we redirect stdout
             # or pipe the output through 'grep', we get a UnicodeEncodeError.
             # Solution: export PYTHONIOENCODING=utf-8
             # See https://stackoverflow.com/questions/492483
-            print(value + "\n")
+            print(value)
 
     def clear_output(self):
         self._out = io.StringIO()
@@ -202,8 +310,8 @@ class Handler(xml.sax.ContentHandler):
         self._filename = filename
 
     def startDocument(self):
-        # history contains 3-tuples in the form
-        # (tag, attrs, characterdata)
+        # history contains 3-item lists in the form
+        # [tag, attrs, list of characterdata chunks]
         self._history = []
         # 0 means not inside i18n:translate area
         self._i18nlevel = 0
@@ -216,7 +324,7 @@ class Handler(xml.sax.ContentHandler):
         pass
 
     def startElement(self, tag, attrs):
-        self._history.append([tag, attrs, ""])
+        self._history.append([tag, attrs, []])
 
         if "i18n:translate" in attrs.keys():
             self._i18nlevel += 1
@@ -228,8 +336,10 @@ class Handler(xml.sax.ContentHandler):
             attr_validator(tag, attrs, self.log)
 
     def endElement(self, tag):
-        tag, attrs, data = self._history.pop()
-        data = data.strip()
+        tag, attrs, chunks = self._history.pop()
+        # The parser may give the text in many chunks.  Joining them once
+        # is linear, where adding them to a string one by one is not.
+        data = "".join(chunks).strip()
 
         if (
             not self._ignore_untranslated
@@ -252,7 +362,7 @@ class Handler(xml.sax.ContentHandler):
             self._ignore_untranslated = False
 
     def characters(self, data):
-        self._history[-1][2] += data
+        self._history[-1][2].append(data)
 
 
 class SilentHandler(Handler):
@@ -324,3 +434,42 @@ class NoSummaryVerboseHandler(Handler):
 
     def endDocument(self):
         pass
+
+
+class JSONLinesHandler(Handler):
+    """Handler that reports each problem as a line of JSON.
+
+    This is meant for other tools.  Each line is an object with the
+    filename, line, column, severity and message of one problem.
+    There is no summary.
+    """
+
+    def finding(self, msg, severity, line=None, column=None):
+        return json.dumps(
+            {
+                "filename": self._filename,
+                "line": line,
+                "column": column,
+                "severity": severity,
+                "message": msg,
+            }
+        )
+
+    def log(self, msg, severity):
+        Handler.log(self, msg, severity)
+        self._out.write(
+            self.finding(
+                msg,
+                severity,
+                self._parser.getLineNumber(),
+                self._parser.getColumnNumber(),
+            )
+        )
+        self._out.write("\n")
+
+    def get_output(self):
+        # One line per problem, without empty lines between the files.
+        return self._out.getvalue().rstrip("\n")
+
+    def unreadable(self, message):
+        return self.finding(message, "FATAL")
@@ -1,4 +1,7 @@
+from functools import lru_cache
+
 import os
+import re
 import subprocess
 
 
@@ -12,6 +15,10 @@ import subprocess
 MAX_WIDTH = 79
 WRAP = False
 
+# undouble_unicode_escape can only change a string that contains a backslash,
+# or a character pair that is a UTF-8 sequence decoded as latin-1.
+NEEDS_UNDOUBLING = re.compile(r"\\|[\xc2-\xf4][\x80-\xbf]")
+
 
 def getPoFiles(product, all=False):
     """Returns all product*.po files in the current folder."""
@@ -232,8 +239,10 @@ def prepare_cli_documentation(data):
     subcommands = [
         "find-untranslated",
         "rebuild-pot",
+        "watch",
         "merge",
         "sync",
+        "diff",
         "filter",
         "admix",
         "list",
@@ -287,6 +296,21 @@ def undouble_unicode_escape(value):
     in the i18ndude code base about filehandles, unicode, printing to stdout
     and then redirecting stdout to filehandles again and then ... etc.
     """
+    if type(value) is not str:
+        return _undouble_unicode_escape(value)
+    if not NEEDS_UNDOUBLING.search(value):
+        # Plain text, nothing to undouble.  This is by far the most common.
+        return value
+    return _cached_undouble_unicode_escape(value)
+
+
+@lru_cache(maxsize=4096)
+def _cached_undouble_unicode_escape(value):
+    return _undouble_unicode_escape(value)
+
+
+def _undouble_unicode_escape(value):
+    """Do the actual work for undouble_unicode_escape."""
 
     # debug = lambda x: ''  # print(x)
 
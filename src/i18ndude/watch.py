@@ -0,0 +1,252 @@
+"""Watch directories for changes in the files that we extract messages from.
+
+On Linux we ask the kernel to tell us about changes with inotify.
+Elsewhere, or when inotify cannot be used, we compare the modification
+times of the files every so often.
+"""
+
+from i18ndude.extract import compile_patterns
+from i18ndude.extract import FileIndex
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+
+# The files that the rebuild-pot readers look at.
+PATTERNS = ("*.*pt", "*.html", "*.kupu", "*.pox", "*.xsl", "*.*py", "*.xml", "*.zcml")
+
+# inotify constants from <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Find changed files by comparing their modification times and sizes.
+
+    `wait` checks the files every `interval` seconds.
+    """
+
+    def __init__(self, paths, exclude=(), interval=1.0):
+        self.paths = paths
+        self.exclude = tuple(exclude)
+        self.interval = interval
+        self.state = self.snapshot()
+
+    def snapshot(self):
+        """Return a dictionary of path -> (modification time, size)."""
+        index = FileIndex(self.paths, exclude=self.exclude)
+        state = {}
+        for pattern in PATTERNS:
+            for filename in index.find(pattern, exclude=self.exclude):
+                try:
+                    stat = os.stat(filename)
+                except OSError:
+                    continue
+                state[filename] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def changes(self):
+        """Return the paths that were added, changed or removed."""
+        old, new = self.state, self.snapshot()
+        self.state = new
+        changed = {path for path, value in new.items() if old.get(path) != value}
+        return changed.union(set(old).difference(new))
+
+    def wait(self, timeout=None):
+        """Wait for changes and return the changed paths.
+
+        After `timeout` seconds without changes, return an empty set.
+        """
+        start = time.monotonic()
+        while True:
+            changed = self.changes()
+            if changed:
+                return changed
+            if timeout is not None and time.monotonic() - start >= timeout:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Find changed files with the inotify API of Linux.
+
+    All directories are watched, except the excluded ones.  Files in them
+    are only reported when their name matches one of the PATTERNS.  Files
+    that were passed explicitly are always reported.  Editors
+    often save a file in several steps, so after the first event we wait
+    `delay` seconds for more events before we report the changes.
+    """
+
+    def __init__(self, paths, exclude=(), delay=0.05):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux.")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        if isinstance(paths, str):
+            paths = (paths,)
+        self.exclude = tuple(exclude)
+        self.match = compile_patterns(PATTERNS)
+        self.excluded = compile_patterns(self.exclude)
+        self.delay = delay
+        # watch descriptor -> directory
+        self.directories = {}
+        # Paths that were passed explicitly instead of a directory.
+        self.files = set()
+        # Directories that we watch with all their subdirectories.
+        self.trees = []
+        try:
+            for path in paths:
+                if os.path.isdir(path):
+                    self.trees.append(os.path.abspath(path))
+                    self.watch_tree(path)
+                else:
+                    self.files.add(os.path.abspath(path))
+                    self.add_watch(os.path.dirname(path) or os.curdir)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, directory):
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self.directories[wd] = directory
+
+    def watch_tree(self, top):
+        """Watch a directory and its subdirectories."""
+        exclude = set(self.exclude)
+        if exclude.intersection(top.split(os.path.sep)):
+            return
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [name for name in dirnames if name not in exclude]
+            self.add_watch(dirpath)
+
+    def in_trees(self, path):
+        """Is the path in one of the directories that we watch completely?"""
+        path = os.path.abspath(path)
+        for tree in self.trees:
+            if path == tree or path.startswith(tree + os.sep):
+                return True
+        return False
+
+    def relevant(self, path):
+        if os.path.abspath(path) in self.files:
+            return True
+        if not self.in_trees(path):
+            # A file next to a file that was passed explicitly.
+            return False
+        name = os.path.basename(path)
+        return bool(self.match(name)) and not self.excluded(name)
+
+    def read_events(self):
+        """Read the waiting events and return the changed paths."""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # We missed events, so we do not know what changed.
+                    # Report all directories, which means: check everything.
+                    changed.update(self.directories.values())
+                    continue
+                if mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                    continue
+                directory = self.directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if not self.in_trees(path):
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # A new directory may already contain files.
+                        before = set(self.directories.values())
+                        try:
+                            self.watch_tree(path)
+                        except OSError:
+                            continue
+                        if set(self.directories.values()) != before:
+                            changed.add(path)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        changed.add(path)
+                elif self.relevant(path):
+                    changed.add(path)
+
+    def wait(self, timeout=None):
+        """Wait for changes and return the changed paths.
+
+        After `timeout` seconds without changes, return an empty set.
+        """
+        start = time.monotonic()
+        changed = set()
+        while not changed:
+            remaining = None
+            if timeout is not None:
+                remaining = max(0, timeout - (time.monotonic() - start))
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return changed
+            changed = self.read_events()
+        # Collect the other events of the same save.
+        while select.select([self.fd], [], [], self.delay)[0]:
+            changed.update(self.read_events())
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def get_watcher(paths, exclude=(), interval=1.0, poll=False):
+    """Return an inotify watcher, or a polling watcher when that fails."""
+    if not poll:
+        try:
+            return InotifyWatcher(paths, exclude=exclude)
+        except (OSError, AttributeError):
+            # No Linux, no inotify in the C library, or no more watches.
+            pass
+    return PollingWatcher(paths, exclude=exclude, interval=interval)
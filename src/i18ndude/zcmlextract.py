@@ -1,3 +1,4 @@
+from i18ndude.extract import extract_files
 from i18ndude.extract import find_files
 from lxml import etree
 
@@ -93,10 +94,23 @@ class ZCMLParser:
         return self.catalogs
 
 
-def zcml_strings(dir, domain="none", exclude=()):
-    """Retrieve all messages from `dir` that are in the `domain`."""
+def zcml_file_catalogs(filename):
+    """Return the messages of one file, keyed by domain."""
     parser = ZCMLParser()
-    for filename in find_files(dir, "*.zcml", exclude=tuple(exclude)):
-        parser.parse(filename)
-
+    parser.parse(filename)
     return parser.getCatalogs()
+
+
+def zcml_strings(dir, domain="none", exclude=(), cache=None):
+    """Retrieve all messages from `dir` that are in the `domain`.
+
+    When you pass an ExtractionCache, unchanged files are not read again.
+    """
+    filenames = find_files(dir, "*.zcml", exclude=tuple(exclude))
+    catalogs = {}
+    for file_catalogs in extract_files(
+        zcml_file_catalogs, filenames, "zcml", cache=cache
+    ):
+        for msg_domain, messages in file_catalogs.items():
+            catalogs.setdefault(msg_domain, []).extend(messages)
+    return catalogs